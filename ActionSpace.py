@@ -0,0 +1,121 @@
+"""The action space maps every possible move in a game of Medina to a dense
+integer index for a given board size. This allows moves to be stored as small
+integers (in search tables, policy networks or game records) instead of as
+move records.
+
+The actions for a board of rows by columns are laid out in blocks in the
+following order:
+
+BUILDING: one block of rows * columns for each color in BUILDINGS_COLORS
+STABLE: rows * columns
+MERCHANT: rows * columns
+ROOFTOP: one block of rows * columns for each color in BUILDINGS_COLORS
+WALL: one action for every location a wall can be added around the board,
+    2 * columns + 2 * rows actions
+PASS: 1
+NONE_POSSIBLE: 1
+
+Actions do not include the name of the player, the player name must be given
+when turning an action back into a move.
+
+>>> get_num_actions(11, 16)
+1816
+>>> move = Move.make_move('Bob', Move.NORMAL, Move.BUILDING, (2, 3), 'Violet')
+>>> action = move_to_action(move, 11, 16)
+>>> action
+211
+>>> action_to_move(action, 'Bob', 11, 16) == move
+True
+>>> wall = Move.make_move('Bob', Move.NORMAL, Move.WALL, (-1, 0))
+>>> action_to_move(move_to_action(wall, 11, 16), 'Bob', 11, 16) == wall
+True
+>>> move_to_action(Move.make_move('Bob', Move.PASS), 11, 16)
+1814
+"""
+
+import Move
+import Board
+import Location
+import GameConstants
+
+_wall_tables = {}
+
+def get_wall_locations(rows, columns):
+    """Gets all the locations a wall could ever be placed around a board of a
+    given size in the order they are numbered in the action space. These are
+    the locations directly outside of the board excluding the corners where
+    the towers stand."""
+    if (rows, columns) not in _wall_tables:
+        walls = [Location.make_location(-1, col) for col in range(columns)]
+        walls += [Location.make_location(rows, col) for col in range(columns)]
+        walls += [Location.make_location(row, -1) for row in range(rows)]
+        walls += [Location.make_location(row, columns) for row in range(rows)]
+        _wall_tables[(rows, columns)] = (walls, {walls[i]:i for i in range(len(walls))})
+    return _wall_tables[(rows, columns)][0]
+
+def get_wall_index(location, rows, columns):
+    """Gets the index of a wall location in get_wall_locations"""
+    get_wall_locations(rows, columns)
+    return _wall_tables[(rows, columns)][1][location]
+
+def get_action_offsets(rows, columns):
+    """Gets the index of the first action of each block in the action space
+    as a dictionary of {piece or move type: offset}"""
+    cells = rows * columns
+    num_colors = len(GameConstants.BUILDINGS_COLORS)
+    offsets = {Move.BUILDING: 0}
+    offsets[Move.STABLE] = offsets[Move.BUILDING] + num_colors * cells
+    offsets[Move.MERCHANT] = offsets[Move.STABLE] + cells
+    offsets[Move.ROOFTOP] = offsets[Move.MERCHANT] + cells
+    offsets[Move.WALL] = offsets[Move.ROOFTOP] + num_colors * cells
+    offsets[Move.PASS] = offsets[Move.WALL] + 2 * (rows + columns)
+    offsets[Move.NONE_POSSIBLE] = offsets[Move.PASS] + 1
+    return offsets
+
+def get_num_actions(rows, columns):
+    """Gets the total number of actions for a board of a given size."""
+    return get_action_offsets(rows, columns)[Move.NONE_POSSIBLE] + 1
+
+def get_board_num_actions(board):
+    """Gets the total number of actions for the size of a given board."""
+    return get_num_actions(Board.get_rows(board), Board.get_columns(board))
+
+def move_to_action(move, rows, columns):
+    """Gets the action index of a move for a board of a given size."""
+    offsets = get_action_offsets(rows, columns)
+    move_type = Move.get_move_type(move)
+    if move_type != Move.NORMAL:
+        return offsets[move_type]
+    piece = Move.get_piece(move)
+    loc = Move.get_location(move)
+    if piece == Move.WALL:
+        return offsets[Move.WALL] + get_wall_index(loc, rows, columns)
+    assert Location.is_within_bounds(loc, rows, columns)
+    cell = Location.get_row(loc) * columns + Location.get_column(loc)
+    if piece == Move.BUILDING or piece == Move.ROOFTOP:
+        color_index = GameConstants.BUILDINGS_COLORS.index(Move.get_move_color(move))
+        return offsets[piece] + color_index * rows * columns + cell
+    return offsets[piece] + cell
+
+def action_to_move(action, player_name, rows, columns):
+    """Gets the move for an action index made by the player with the given
+    name. This is the inverse of move_to_action."""
+    assert 0 <= action < get_num_actions(rows, columns)
+    offsets = get_action_offsets(rows, columns)
+    cells = rows * columns
+    if action == offsets[Move.NONE_POSSIBLE]:
+        return Move.make_move(player_name, Move.NONE_POSSIBLE)
+    if action == offsets[Move.PASS]:
+        return Move.make_move(player_name, Move.PASS)
+    if action >= offsets[Move.WALL]:
+        loc = get_wall_locations(rows, columns)[action - offsets[Move.WALL]]
+        return Move.make_move(player_name, Move.NORMAL, Move.WALL, loc)
+    for piece in [Move.ROOFTOP, Move.MERCHANT, Move.STABLE, Move.BUILDING]:
+        if action >= offsets[piece]:
+            index = action - offsets[piece]
+            color = None
+            if piece == Move.BUILDING or piece == Move.ROOFTOP:
+                color = GameConstants.BUILDINGS_COLORS[index // cells]
+                index %= cells
+            loc = Location.make_location(index // columns, index % columns)
+            return Move.make_move(player_name, Move.NORMAL, piece, loc, color)
@@ -15,7 +15,80 @@ make_decision(board, player_index, players, tile_supply, num_moves)
     - tile_supply the game's tile supply
     - num_moves is the number of moves the agent can make
 
-This function must return a list of moves that the player makes."""
+This function must return a list of moves that the player makes.
+
+Moves can be applied with apply_move, which returns a copy of the game state
+with the move applied, or with apply_move_in_place, which changes the given
+state and returns an undo record so unapply_move can take the move back. The
+second is much cheaper for agents that search through many moves.
+
+The tiles for a rooftop go to the player who placed it, even when that player
+is the last one to claim a building of its color:
+
+>>> players = [Player.make_player('Nick', 2), Player.make_player('Erin', 2)]
+>>> board, tile_supply = Board.make_board(11, 16), Tile.make_tile_supply()
+>>> for index in [1, 0]:
+...     name = Player.get_player_name(players[index])
+...     loc = min(Board.get_building_piece_locations(board, TEA_COLOR))
+...     for piece in [Move.BUILDING, Move.ROOFTOP]:
+...         move = Move.make_move(name, Move.NORMAL, piece, loc, TEA_COLOR)
+...         board, players, tile_supply = apply_move(move, board, tile_supply,
+...                                                  index, players)
+>>> [len(Player.get_tiles_of_type(player, Tile.TEA_TILE)) for player in players]
+[2, 3]
+>>> [Player.get_held_buildings_of_color(player, TEA_COLOR) for player in players]
+[0, 0]
+
+A move applied with apply_move_in_place and taken back with unapply_move
+leaves exactly the state from before the move. Here random moves are applied
+in place and then taken back one at a time, and each state is compared with
+clones made before the move:
+
+>>> def get_building(building):
+...     owner = Building.has_owner(building) and (Building.get_owner(building),
+...             Building.get_rooftop_location(building))
+...     return (Building.get_building_color(building), owner,
+...             Building.get_building_locations(building),
+...             Building.get_stable_locations(building))
+>>> def get_tiles(group):
+...     return (Tile.get_group_counts(group), sorted(Tile.get_num_merchants(tile)
+...             for tile in Tile.get_group_tiles_of_type(group, Tile.TOWER_TILE)))
+>>> def get_state(board, players, tile_supply):
+...     active = [Board.get_active_building(board, color)
+...             for color in GameConstants.BUILDINGS_COLORS]
+...     held = [(Player.get_held_buildings(player), Player.get_num_stables(player),
+...             Player.get_held_rooftops(player), Player.get_extra_rooftops(player),
+...             Player.get_held_merchants(player), Player.get_held_walls(player),
+...             Player.get_score(player), get_tiles(Player.get_tile_group(player)),
+...             [get_building(building) for building in Board.get_buildings_claimed_by(
+...                     board, Player.get_player_name(player))]) for player in players]
+...     return ([get_building(building) for building in Board.get_buildings(board)],
+...             [building and get_building(building) for building in active],
+...             Board.get_market(board), Tower.get_wall_locations(Board.get_towers(board)),
+...             Board.get_grid(board), Board.get_coverage(board),
+...             Board.get_street_starts(board), Board.get_placements(board),
+...             Board.get_hash(board), held, get_tiles(tile_supply))
+>>> rng = random.Random(7)
+>>> players = [Player.make_player('Nick', 2), Player.make_player('Erin', 2)]
+>>> board, tile_supply = Board.make_board(11, 16, rng), Tile.make_tile_supply()
+>>> state_hash = Zobrist.get_hash(board, players, tile_supply)
+>>> saved, pieces = [], set()
+>>> for i in range(40):
+...     move = rng.choice(get_all_possible_moves(players[i % 2], board))
+...     pieces.add(Move.get_piece(move) or Move.get_move_type(move))
+...     before = (Board.clone_board(board), [Player.clone_player(player)
+...             for player in players], Tile.clone_tile_group(tile_supply))
+...     undo = apply_move_in_place(move, board, tile_supply, i % 2, players, rng)
+...     saved.append(before + (undo,))
+>>> sorted(pieces)
+['BUILDING', 'MERCHANT', 'PASS', 'ROOFTOP', 'STABLE', 'WALL']
+>>> all_same = True
+>>> for before_board, before_players, before_supply, undo in reversed(saved):
+...     unapply_move(undo)
+...     all_same &= get_state(board, players, tile_supply) == \\
+...             get_state(before_board, before_players, before_supply)
+>>> all_same
+True"""
 
 import Move
 import Board
@@ -26,6 +99,9 @@ import Building
 import Tile
 import Location
 import GameConstants
+import Zobrist
+import Score
+import random
 
 TEA_COLOR = GameConstants.BUILDINGS_COLORS[1]
 
@@ -33,38 +109,30 @@ def get_all_possible_moves(player, board):
     """Gets all the differnt VALID moves that a player can be made in a board.
     If there are no valid moves, a move of NONE_POSSIBLE will be returned."""
     possible = []
+    name = Player.get_player_name(player)
     for color in GameConstants.BUILDINGS_COLORS:
-        for loc in Board.get_building_piece_locations(board, color):
-            if(Player.get_held_buildings_of_color(player, color) > 0):
-                possible.append(Move.make_move(Player.get_player_name(player), Move.NORMAL, Move.BUILDING, loc, color))
+        if Player.get_held_buildings_of_color(player, color) > 0:
+            for loc in Board.get_building_piece_locations(board, color):
+                possible.append(Move.make_move(name, Move.NORMAL, Move.BUILDING, loc, color))
         building = Board.get_active_building(board, color)
-        has_claimed = False
-        for building in Board.get_buildings_by_color(board, color):
-            if Building.get_owner(building) == Player.get_player_name(player):
-                has_claimed = True
-        if not has_claimed and Board.get_active_building(board, color) != None and \
-                not Building.has_owner(Board.get_active_building(board, color)):
+        if building != None and not Board.has_claimed_color(board, name, color):
             for loc in Building.get_building_locations(building):
-                possible.append(Move.make_move(Player.get_player_name(player), Move.NORMAL, Move.ROOFTOP, loc, color))
-    for loc in Board.get_stable_piece_location(board):
-        if(Player.get_num_stables(player) > 0):
-            possible.append(Move.make_move(Player.get_player_name(player), Move.NORMAL, Move.STABLE, loc, color))
-    for loc in Board.get_merchant_place_locations(board):
-        if(Player.get_held_merchants(player) > 0):
-            possible.append(Move.make_move(Player.get_player_name(player), Move.NORMAL, Move.MERCHANT, loc))
-    for loc in Tower.get_possible_wall_additions(Board.get_towers(board)):
-        if(Player.get_held_walls(player) > 0):
-            possible.append(Move.make_move(Player.get_player_name(player), Move.NORMAL, Move.WALL, loc))
+                possible.append(Move.make_move(name, Move.NORMAL, Move.ROOFTOP, loc, color))
+    if Player.get_num_stables(player) > 0:
+        for loc in Board.get_stable_piece_location(board):
+            possible.append(Move.make_move(name, Move.NORMAL, Move.STABLE, loc))
+    if Player.get_held_merchants(player) > 0:
+        for loc in Board.get_merchant_place_locations(board):
+            possible.append(Move.make_move(name, Move.NORMAL, Move.MERCHANT, loc))
+    if Player.get_held_walls(player) > 0:
+        for loc in Board.get_wall_piece_locations(board):
+            possible.append(Move.make_move(name, Move.NORMAL, Move.WALL, loc))
 
-    has_tea = False
-    for tile in Player.get_tiles(player):
-        if Tile.get_tile_type(tile) == Tile.TEA_TILE:
-            has_tea = True
-    if has_tea:
-        possible.append(Move.make_move(Player.get_player_name(player), Move.PASS))
+    if Player.get_num_tiles_of(player, Tile.TEA_TILE) > 0:
+        possible.append(Move.make_move(name, Move.PASS))
 
     if not possible:
-        possible.append(Move.make_move(Player.get_player_name(player), Move.NONE_POSSIBLE))
+        possible.append(Move.make_move(name, Move.NONE_POSSIBLE))
 
     return possible
 
@@ -87,7 +155,7 @@ def can_make_move(board, player):
     if len(Board.get_merchant_place_locations(board)):
         if(Player.get_held_merchants(player) > 0):
             return True
-    if len(Tower.get_possible_wall_additions(Board.get_towers(board))):
+    if len(Board.get_wall_piece_locations(board)):
         if(Player.get_held_walls(player) > 0):
             return True
 
@@ -126,32 +194,40 @@ def is_valid_move(move, board, player):
                 return False
             if move_loc not in Building.get_building_locations(claimed_building):
                 return False
-            for building in Board.get_buildings_by_color(board, move_color):
-                if Building.get_owner(building) == Player.get_player_name(player):
-                    return False
-            return True
+            return not Board.has_claimed_color(board, Player.get_player_name(player), move_color)
         elif piece == Move.WALL:
-            return Player.get_held_walls(player) > 0 and move_loc in Tower.get_possible_wall_additions(Board.get_towers(board))
+            return Player.get_held_walls(player) > 0 and move_loc in Board.get_wall_piece_locations(board)
         return False
 
-def apply_move(move, board, tile_supply, player_index, players):
+def apply_move(move, board, tile_supply, player_index, players, rng=random):
     """Applys a given move to a board and returns a new board with the move
-    applyed to it. The original board remains unchanged."""
+    applyed to it. The original board remains unchanged and shares every part
+    the move does not change with the new board. rng is only used if
+    a rooftop is placed outside of the building it claims (see
+    Building.assign_owner)."""
+    board = Board.clone_board(board)
+    tile_supply = Tile.clone_tile_group(tile_supply)
+    players = [Player.clone_player(player) for player in players]
+    apply_move_in_place(move, board, tile_supply, player_index, players, rng,
+            keep_undo=False)
+    return board, players, tile_supply
+
+def apply_move_in_place(move, board, tile_supply, player_index, players,
+        rng=random, keep_undo=True):
+    """Applys a given move to a board, tile supply and players by changing
+    them. This returns an undo record that can be given to unapply_move to
+    restore the exact state from before the move was applied. If keep_undo is
+    False, no undo record is made and None is returned."""
     def get_tile_from_supply(tile_supply, tile_type, value=0):
         """Gets a tile from the supply"""
-        for i in range(len(tile_supply)):
-            tile = tile_supply[i]
-            if Tile.get_tile_value(tile) == value and Tile.get_tile_type(tile) == tile_type:
-                return tile_supply.pop(i)
-        return None
+        return Tile.take_from_group(tile_supply, tile_type, value)
 
     def get_tile_from_all(players, tile_type, value=0):
         """Gets a tile from any of the players, returns the first tile found"""
-        for other in players:
-            taken = Player.take_tile(other, tile_type, value)
-            if taken != None:
-                return taken
-        return None
+        holder = get_tile_holder(players, tile_type, value)
+        if holder == None:
+            return None
+        return Player.take_tile(holder, tile_type, value)
 
     def get_tile_from_others(players, player_index, tile_type, value=0):
         """Gets a tile from other players, player_index is the current player"""
@@ -203,57 +279,122 @@ def apply_move(move, board, tile_supply, player_index, players):
                 connected.append(num)
         return connected
 
-    board = Board.clone_board(board)
-    tile_supply = [Tile.clone_tile(tile) for tile in tile_supply]
-    players = [Player.clone_player(player) for player in players]
+    def score_orthogonal_buildings(players, location, board):
+        """Gives a point to the owner of each claimed building orthogonal to
+        a merchant or wall just placed at a location."""
+        for other in players:
+            for building in Board.get_buildings_claimed_by(board, Player.get_player_name(other)):
+                if location in Building.get_building_stable_orthogonal(building):
+                    Player.add_score(other, 1)
+
+    def hash_held(other, piece):
+        """XORs the key of the number of a piece held by a player into the
+        hash. This is done before and after the number changes."""
+        nonlocal state_hash
+        state_hash ^= Zobrist.get_held_key(other, piece)
+
+    def hash_tiles(tile_type, value=0):
+        """XORs the keys of the tiles of a type and value held by the players
+        and the tile supply into the hash. This is done before and after the
+        tiles move."""
+        nonlocal state_hash
+        state_hash ^= Zobrist.get_tile_holders_key(tile_supply, players, tile_type, value)
+
+    def give_tower_tile(num, owner):
+        """Gives the tile of a tower to the owner of a building (a player name
+        or the neutral owner, who puts it back in the supply). The tile is
+        taken from the supply or from the player holding it."""
+        hash_tiles(Tile.TOWER_TILE, num)
+        tile = get_tile_from_supply(tile_supply, Tile.TOWER_TILE, num)
+        if tile == None:
+            tile = get_tile_from_all(players, Tile.TOWER_TILE, num)
+        if owner == Building.NEUTRAL_OWNER:
+            Tile.add_to_group(tile_supply, tile)
+        else:
+            receiver = get_player_with_name(players, owner)
+            hash_held(receiver, 'MERCHANT')
+            Player.give_tile(receiver, tile)
+            hash_held(receiver, 'MERCHANT')
+        hash_tiles(Tile.TOWER_TILE, num)
+
+    state_hash = Zobrist.get_hash(board, players, tile_supply)
+    undo = None
+    if keep_undo:
+        undo = {'players': [(other, Player.save_player(other)) for other in players],
+                'tile_supply': (tile_supply, Tile.clone_tile_group(tile_supply)),
+                'actions': [],
+                'hash': (board, state_hash),
+                'placements': (board, Board.get_placements(board).copy())}
+    #The undo actions are only kept if there is an undo record
+    undo_actions = undo['actions'] if keep_undo else []
     player = players[player_index]
     if Move.get_move_type(move) == Move.NONE_POSSIBLE:
         pass
     elif Move.get_move_type(move) == Move.PASS:
+        hash_tiles(Tile.TEA_TILE)
         Player.lose_tile(player, Tile.TEA_TILE, 0)
+        hash_tiles(Tile.TEA_TILE)
     else:
         piece = Move.get_piece(move)
         loc = Move.get_location(move)
         if piece == Move.BUILDING:
             color = Move.get_move_color(move)
+            hash_held(player, color)
             Player.play_building(player, color)
+            hash_held(player, color)
             if Board.get_active_building(board, color) == None:
                 Board.start_new_building(board, loc, color)
+                state_hash ^= Zobrist.get_building_key(color, loc)
+                undo_actions.append((Board.remove_building, (board, Board.get_active_building(board, color))))
             else:
-                Building.attach_building_locations(Board.get_active_building(board, color), loc)
+                Board.place_building_piece(board, Board.get_active_building(board, color), loc)
+                state_hash ^= Zobrist.get_building_key(color, loc)
+                undo_actions.append((Board.remove_building_piece, (board, Board.get_active_building(board, color), loc)))
         elif piece == Move.STABLE:
+            hash_held(player, 'STABLE')
             Player.play_stable(player)
+            hash_held(player, 'STABLE')
             for building in Board.get_buildings(board):
                 if loc in Building.get_building_peice_attach(building):
                     before_adj = get_adj_towers_to_building(Board.get_towers(board), building)
-                    Building.attach_stable_location(building, loc)
+                    scorer = None
+                    if Building.has_owner(building) and Building.get_owner(building) != Building.NEUTRAL_OWNER:
+                        scorer = get_player_with_name(players, Building.get_owner(building))
+                        before_score = Score.get_building_score(board, building)
+                    Board.place_stable(board, building, loc)
+                    state_hash ^= Zobrist.get_stable_key(loc)
+                    undo_actions.append((Board.remove_stable, (board, building, loc)))
+                    if scorer != None:
+                        Player.add_score(scorer, Score.get_building_score(board, building) - before_score)
                     after_adj = get_adj_towers_to_building(Board.get_towers(board), building)
                     new_towers = []
                     for t in after_adj:
                         if t not in before_adj:
                             new_towers.append(t)
                     if Building.has_owner(building):
-                        new_owner = Building.get_owner(building)
                         for num in set(new_towers):
                             #we have a new owner
-                            tile = get_tile_from_supply(tile_supply, Tile.TOWER_TILE, num)
-                            if tile == None:
-                                tile = get_tile_from_all(players, Tile.TOWER_TILE, num)
-                            if new_owner == Building.NEUTRAL_OWNER:
-                                tile_supply.append(tile)
-                            else:
-                                new_owner = get_player_with_name(players, new_owner)
-                                Player.give_tile(new_owner, tile)
+                            give_tower_tile(num, Building.get_owner(building))
 
         elif piece == Move.MERCHANT:
+            hash_held(player, 'MERCHANT')
             Player.play_merchant(player)
-            Market.add_merchant_to_market(Board.get_market(board), loc)
+            hash_held(player, 'MERCHANT')
+            Board.place_merchant(board, loc)
+            score_orthogonal_buildings(players, loc, board)
+            state_hash ^= Zobrist.get_merchant_key(
+                Market.get_num_streets(Board.get_market(board)) - 1, loc)
+            undo_actions.append((Board.remove_merchant, (board, loc)))
         elif piece == Move.ROOFTOP:
             color = Move.get_move_color(move)
+            hash_held(player, 'ROOFTOP')
             Player.play_rooftop(player)
+            hash_held(player, 'ROOFTOP')
             claimed_building = Board.get_active_building(board, color)
-            Building.assign_owner(claimed_building, Player.get_player_name(player), Player.get_player_color(player), loc)
-            Board.get_buildings_by_color(board, color)
+            Board.claim_building(board, claimed_building, Player.get_player_name(player), Player.get_player_color(player), loc, rng)
+            undo_actions.append((Board.unclaim_building, (board, claimed_building)))
+            state_hash ^= Zobrist.get_owner_key(claimed_building)
+            Player.add_score(player, Score.get_building_score(board, claimed_building))
             claimed = []
             size = len(Building.get_building_locations(claimed_building))
             is_largest = True
@@ -263,46 +404,51 @@ def apply_move(move, board, tile_supply, player_index, players):
                 if claimed_building != building and len(Building.get_building_locations(building)) >= size:
                     is_largest = False
             if len(claimed) == len(players):
-                for player in players:
-                    Player.remove_all_buildings_of_color(player, color)
+                for other in players:
+                    hash_held(other, color)
+                    Player.remove_all_buildings_of_color(other, color)
+                    hash_held(other, color)
             if is_largest:
+                hash_tiles(Tile.PALACE_TILE, Tile.PALACE_VALUES[color])
                 from_supply = get_tile_from_supply(tile_supply, Tile.PALACE_TILE, Tile.PALACE_VALUES[color])
                 if from_supply != None:
                     Player.give_tile(player, from_supply)
                 else:
                     from_others = get_tile_from_others(players, player_index, Tile.PALACE_TILE, Tile.PALACE_VALUES[color])
                     Player.give_tile(player, from_others)
+                hash_tiles(Tile.PALACE_TILE, Tile.PALACE_VALUES[color])
 
             if color == TEA_COLOR:
                 num = len(Board.get_buildings_by_color(board, TEA_COLOR))
+                hash_tiles(Tile.TEA_TILE)
                 for i in range(4 - num):
                     Player.give_tile(player, get_tile_from_supply(tile_supply, Tile.TEA_TILE))
+                hash_tiles(Tile.TEA_TILE)
 
             adj = set(get_adj_towers_to_building(Board.get_towers(board), claimed_building))
             for tower_num in adj:
-                tile = get_tile_from_supply(tile_supply, Tile.TOWER_TILE, tower_num)
-                if tile == None:
-                    tile = get_tile_from_all(players, Tile.TOWER_TILE, tower_num)
-                Player.give_tile(player, tile)
+                give_tower_tile(tower_num, Player.get_player_name(player))
 
         elif piece == Move.WALL:
             towers = Board.get_towers(board)
+            hash_held(player, 'WALL')
             Player.play_wall(player)
+            hash_held(player, 'WALL')
             for num in range(1, 5):
-                tower = Tower.get_tower(towers, num)
+                tower_key = Zobrist.get_tower_key(towers, num)
                 added = False
                 before_adj = set()
-                if loc == (Tower.get_tower_addition_c(towers, num)):
-                    before_adj = get_buildings_adjacent_to_tower(Board.get_towers(board), num, board)
-                    Tower.add_tower_c(tower)
-                    added = True
-                elif loc == (Tower.get_tower_addition_r(towers, num)):
+                if loc == Tower.get_tower_addition_c(towers, num) or \
+                        loc == Tower.get_tower_addition_r(towers, num):
                     before_adj = get_buildings_adjacent_to_tower(Board.get_towers(board), num, board)
-                    Tower.add_tower_r(tower)
+                    tower_num, is_column = Board.add_wall(board, loc)
+                    undo_actions.append((Board.remove_wall, (board, tower_num, is_column)))
                     added = True
 
                 if added:
-                    buildings = get_buildings_adjacent_to_tower(Board.get_towers(board), num, board)
+                    state_hash ^= tower_key ^ Zobrist.get_tower_key(towers, tower_num)
+                    score_orthogonal_buildings(players, loc, board)
+                    buildings = get_buildings_adjacent_to_tower(Board.get_towers(board), tower_num, board)
                     new_buildings = []
                     for b in buildings:
                         if b not in before_adj:
@@ -311,30 +457,49 @@ def apply_move(move, board, tile_supply, player_index, players):
                         #we have a new owner
                         new_building = new_buildings[0]
                         if Building.has_owner(new_building):
-                            new_owner = Building.get_owner(new_building)
-                            tile = get_tile_from_supply(tile_supply, Tile.TOWER_TILE, num)
-                            if tile == None:
-                                tile = get_tile_from_all(players, Tile.TOWER_TILE, num)
-                            if new_owner == Building.NEUTRAL_OWNER:
-                                tile_supply.append(tile)
-                            else:
-                                new_owner = get_player_with_name(players, new_owner)
-                                Player.give_tile(new_owner, tile)
+                            give_tower_tile(tower_num, Building.get_owner(new_building))
 
-    return board, players, tile_supply
+    Board.set_hash(board, state_hash)
+    return undo
+
+def unapply_move(undo):
+    """Restores the board, tile supply and players changed by
+    apply_move_in_place to their state before the move. This takes the undo
+    record returned by apply_move_in_place. Moves must be unapplied in the
+    reverse order they were applied and each undo record can only be used
+    once."""
+    for action, args in reversed(undo['actions']):
+        action(*args)
+    tile_supply, saved = undo['tile_supply']
+    Tile.restore_tile_group(tile_supply, saved)
+    for player, saved in undo['players']:
+        Player.restore_player(player, saved)
+    board, saved = undo['hash']
+    Board.set_hash(board, saved)
+    board, saved = undo['placements']
+    Board.set_placements(board, saved)
+
+def get_tile_holder(players, tile_type, value=0):
+    """Gets the first player holding a tile of a type and value, or None if no
+    player holds one (the tile is in the tile supply)."""
+    for player in players:
+        if Player.get_num_tiles_of(player, tile_type, value) > 0:
+            return player
+    return None
 
 def get_agent_moves(agent, board, current, tile_supply, players, num_moves=2):
     """Gets the moves made by an agent for his/her/it's turn."""
     return agent(board, current, players, tile_supply, num_moves)
 
-def get_random_agent():
-    """A random agent for testing the functionality of the agent."""
-    import random
+def get_random_agent(rng=random):
+    """A random agent for testing the functionality of the agent. rng is the
+    random number generator used to select moves, the random module by
+    default."""
     def make_moves(board, player_index, players, tile_supply, num_moves):
         moves = []
         for i in range(num_moves):
-            move = random.choice(get_all_possible_moves(players[player_index], board))
-            board, players, tile_supply = apply_move(move, board, tile_supply, player_index, players)
+            move = rng.choice(get_all_possible_moves(players[player_index], board))
+            board, players, tile_supply = apply_move(move, board, tile_supply, player_index, players, rng)
             moves.append(move)
         return moves;
     return make_moves;
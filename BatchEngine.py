@@ -0,0 +1,573 @@
+"""The batch engine plays many games of Medina at once. Instead of a board,
+players and tile supply for each game, a batch holds arrays with one entry for
+each game (a struct of arrays) and every game makes one move each step. The
+moves of all the games are applied together with NumPy, which is much faster
+than applying them one game at a time when running many random playouts.
+
+The rules are the same as Agent.apply_move and Game.run_game, and moves are
+given as actions of ActionSpace. Every game in a batch has the same board size
+and number of players.
+
+A batch (a BatchState) holds:
+
+planes: the planes of each board as encoded by StateEncoding for player 0, so
+    the owner planes are in the order of the players
+structure: the index of the building each building piece and stable is part
+    of, or NO_BUILDING
+building_color, building_owner, building_size: the color index, owner (player
+    index or NO_OWNER) and number of building pieces of each building in the
+    order the buildings were started
+active: the index of the active building of each color or NO_BUILDING
+claimed: the number of buildings of each color claimed by players
+walls: the number of vertical and horizontal walls of each tower
+held: the pieces held by each player, see HELD_BUILDINGS to HELD_WALLS
+tile_holder: the player holding each tile, SUPPLY or DISCARDED. Tiles are
+    numbered with the palace tiles first (by color), then the tower tiles (by
+    tower number) then the tea tiles.
+tower_merchants: the merchants left on each tower tile
+current, moves_left, turn, all_pass, no_moves, done: the turn of each game as
+    in Game.run_game
+
+>>> batch = make_batch(8, 3, rng=np.random.default_rng(1))
+>>> scores = play_random_games(batch, np.random.default_rng(2))
+>>> scores.shape, bool(batch.done.all())
+((8, 3), True)
+"""
+
+import numpy as np
+import ActionSpace
+import Agent
+import Board
+import Building
+import GameConstants
+import Move
+import Player
+import StateEncoding
+import Tile
+import Tower
+from PlacementMasks import *
+
+NO_BUILDING = -1
+NO_OWNER = -1
+NEUTRAL = -2
+"""Owner of buildings claimed by the neutral player"""
+
+SUPPLY = -1
+DISCARDED = -2
+"""Holder of tea tiles that were used to pass"""
+
+MAX_BUILDINGS = NUM_COLORS * (MAX_PLAYERS + 1)
+"""Most buildings in a game, every player can claim one building of each color
+and each color has at most one active building"""
+
+HELD_BUILDINGS = 0
+HELD_STABLES = HELD_BUILDINGS + NUM_COLORS
+HELD_ROOFTOPS = HELD_STABLES + 1
+HELD_EXTRA = HELD_ROOFTOPS + 1
+HELD_MERCHANTS = HELD_EXTRA + 1
+HELD_WALLS = HELD_MERCHANTS + 1
+NUM_HELD = HELD_WALLS + 1
+
+PALACE_TILES = 0
+TOWER_TILES = PALACE_TILES + NUM_COLORS
+TEA_TILES = TOWER_TILES + 4
+NUM_TILES = TEA_TILES + len(Tile.get_tea_tiles())
+
+TEA_COLOR = GameConstants.BUILDINGS_COLORS.index(Agent.TEA_COLOR)
+"""Index of the color of buildings that give tea tiles"""
+
+_tables = {}
+
+class BatchState:
+    """The arrays of a batch of games. This should only be used through the
+    functions of this module."""
+    __slots__ = ('rows', 'columns', 'num_players', 'planes', 'structure',
+            'building_color', 'building_owner', 'building_size', 'num_buildings',
+            'active', 'claimed', 'walls', 'held', 'tile_holder', 'tower_merchants',
+            'current', 'moves_left', 'turn', 'all_pass', 'no_moves', 'done')
+
+def get_tables(rows, columns):
+    """Gets the tables of a board size as a dictionary. The tables are saved so
+    they are only made once for each size.
+
+    edges: for each tower, each wall direction (vertical then horizontal) and
+        each number of walls, a mask of the locations next to the walls
+    additions: for each tower, each wall direction and each number of walls,
+        the index in ActionSpace.get_wall_locations of the next wall, or -1 if
+        there is no room for another wall
+    """
+    if (rows, columns) not in _tables:
+        longest = max(rows, columns) + 1
+        edges = np.zeros((4, 2, longest, rows, columns), dtype=bool)
+        additions = np.full((4, 2, longest), -1, dtype=np.int64)
+        wall_locations = ActionSpace.get_wall_locations(rows, columns)
+        for number in range(1, 5):
+            for direction, add, get_addition in [(0, Tower.add_tower_r, Tower.get_tower_addition_r),
+                    (1, Tower.add_tower_c, Tower.get_tower_addition_c)]:
+                towers = Tower.make_towers(rows, columns)
+                for length in range(longest):
+                    next_wall = get_addition(towers, number)
+                    if next_wall in wall_locations:
+                        additions[number - 1, direction, length] = \
+                                ActionSpace.get_wall_index(next_wall, rows, columns)
+                    for row, column in Tower.get_wall_locations_for_tower(towers, number - 1):
+                        edges[number - 1, direction, length, min(max(row, 0), rows - 1),
+                                min(max(column, 0), columns - 1)] = True
+                    add(Tower.get_tower(towers, number))
+        _tables[(rows, columns)] = {'edges': edges, 'additions': additions}
+    return _tables[(rows, columns)]
+
+def make_empty_batch(num_games, num_players, rows, columns):
+    """Makes a batch of games with empty boards and no pieces held."""
+    batch = BatchState()
+    batch.rows = rows
+    batch.columns = columns
+    batch.num_players = num_players
+    batch.planes = np.zeros((num_games, NUM_PLANES, rows, columns), dtype=StateEncoding.DTYPE)
+    batch.structure = np.full((num_games, rows, columns), NO_BUILDING, dtype=np.int8)
+    batch.building_color = np.full((num_games, MAX_BUILDINGS), -1, dtype=np.int8)
+    batch.building_owner = np.full((num_games, MAX_BUILDINGS), NO_OWNER, dtype=np.int8)
+    batch.building_size = np.zeros((num_games, MAX_BUILDINGS), dtype=np.int16)
+    batch.num_buildings = np.zeros(num_games, dtype=np.int16)
+    batch.active = np.full((num_games, NUM_COLORS), NO_BUILDING, dtype=np.int16)
+    batch.claimed = np.zeros((num_games, NUM_COLORS), dtype=np.int8)
+    batch.walls = np.zeros((num_games, 4, 2), dtype=np.int16)
+    batch.held = np.zeros((num_games, num_players, NUM_HELD), dtype=np.int16)
+    batch.tile_holder = np.full((num_games, NUM_TILES), SUPPLY, dtype=np.int8)
+    batch.tower_merchants = np.zeros((num_games, 4), dtype=np.int8)
+    batch.current = np.zeros(num_games, dtype=np.int64)
+    batch.moves_left = np.ones(num_games, dtype=np.int8)
+    batch.turn = np.zeros(num_games, dtype=np.int32)
+    batch.all_pass = np.ones(num_games, dtype=bool)
+    batch.no_moves = np.zeros(num_games, dtype=np.int8)
+    batch.done = np.zeros(num_games, dtype=bool)
+    return batch
+
+def make_batch(num_games, num_players, rows=11, columns=16, rng=None, start_player=None):
+    """Makes a batch of new games set up like Board.make_board and
+    Player.make_player. rng is the NumPy random generator used to place the
+    wells and first merchants and to pick the start players. If start_player is
+    given, every game starts with that player."""
+    if rng == None:
+        rng = np.random.default_rng()
+    batch = make_empty_batch(num_games, num_players, rows, columns)
+    games = np.arange(num_games)
+    well = rng.integers(1, [rows - 1, columns - 1], size=(num_games, 2))
+    start = rng.integers(1, [rows - 1, columns - 1], size=(num_games, 2))
+    same = (well == start).all(axis=1)
+    while same.any():
+        start[same] = rng.integers(1, [rows - 1, columns - 1], size=(same.sum(), 2))
+        same = (well == start).all(axis=1)
+    planes = batch.planes
+    planes[games, WELL_PLANE, well[:, 0], well[:, 1]] = 1
+    well_mask = planes[:, WELL_PLANE] != 0
+    planes[:, COVERAGE_PLANE] = get_dilated_mask(well_mask)
+    bonus = np.zeros_like(well_mask)
+    bonus[:, 2:, :] |= well_mask[:, :-2, :]
+    bonus[:, :-2, :] |= well_mask[:, 2:, :]
+    bonus[:, :, 2:] |= well_mask[:, :, :-2]
+    bonus[:, :, :-2] |= well_mask[:, :, 2:]
+    planes[:, WELL_BONUS_PLANE] = bonus
+    planes[games, MERCHANT_PLANE, start[:, 0], start[:, 1]] = 1
+    planes[games, STREET_PLANE, start[:, 0], start[:, 1]] = 1
+    batch.held[:, :, HELD_BUILDINGS:HELD_STABLES] = Player.BUILDINGS_GIVEN[num_players]
+    batch.held[:, :, HELD_STABLES] = Player.STABLES_GIVEN[num_players]
+    batch.held[:, :, HELD_ROOFTOPS] = Player.ROOFTOPS_GIVEN[num_players]
+    batch.held[:, :, HELD_EXTRA] = Player.EXTRA_ROOFTOPS_GIVEN[num_players]
+    batch.held[:, :, HELD_MERCHANTS] = Player.MERCHANTS_GIVEN[num_players]
+    batch.held[:, :, HELD_WALLS] = Player.WALLS_GIVEN[num_players]
+    batch.tower_merchants[:] = [Tile.get_num_merchants(tile) for tile in Tile.get_tower_tiles()]
+    if start_player == None:
+        batch.current[:] = rng.integers(num_players, size=num_games)
+    else:
+        batch.current[:] = start_player
+    return batch
+
+def load_state(batch, game, board, players, tile_supply, current_player, turn=0):
+    """Sets a game of a batch to a state of the single game engine (a board,
+    players and tile supply) with current_player to move and turn turns played
+    (see Game.turn_moves). The board must be the size of the batch."""
+    assert Board.get_rows(board) == batch.rows and Board.get_columns(board) == batch.columns
+    assert len(players) == batch.num_players
+    names = [Player.get_player_name(player) for player in players]
+    batch.planes[game] = 0
+    StateEncoding.fill_planes(batch.planes[game], board, players, 0)
+    batch.structure[game] = NO_BUILDING
+    batch.building_color[game] = -1
+    batch.building_owner[game] = NO_OWNER
+    batch.building_size[game] = 0
+    batch.active[game] = NO_BUILDING
+    batch.claimed[game] = 0
+    buildings = Board.get_buildings(board)
+    for index in range(len(buildings)):
+        building = buildings[index]
+        color = GameConstants.BUILDINGS_COLORS.index(Building.get_building_color(building))
+        for row, column in Building.get_building_and_stables(building):
+            batch.structure[game, row, column] = index
+        batch.building_color[game, index] = color
+        batch.building_size[game, index] = len(Building.get_building_locations(building))
+        owner = Building.get_owner(building)
+        if owner == None:
+            batch.active[game, color] = index
+        elif owner == Building.NEUTRAL_OWNER:
+            batch.building_owner[game, index] = NEUTRAL
+        else:
+            batch.building_owner[game, index] = names.index(owner)
+            batch.claimed[game, color] += 1
+    batch.num_buildings[game] = len(buildings)
+    towers = Board.get_towers(board)
+    for number in range(1, 5):
+        tower = Tower.get_tower(towers, number)
+        batch.walls[game, number - 1] = [Tower.get_tower_wall_v(tower), Tower.get_tower_wall_h(tower)]
+    for index in range(len(players)):
+        player = players[index]
+        for color in range(NUM_COLORS):
+            batch.held[game, index, HELD_BUILDINGS + color] = Player.get_held_buildings_of_color(
+                    player, GameConstants.BUILDINGS_COLORS[color])
+        batch.held[game, index, HELD_STABLES] = Player.get_num_stables(player)
+        batch.held[game, index, HELD_ROOFTOPS] = Player.get_held_rooftops(player)
+        batch.held[game, index, HELD_EXTRA] = Player.get_extra_rooftops(player)
+        batch.held[game, index, HELD_MERCHANTS] = Player.get_held_merchants(player)
+        batch.held[game, index, HELD_WALLS] = Player.get_held_walls(player)
+    batch.tile_holder[game] = DISCARDED
+    batch.tower_merchants[game] = 0
+    tea = TEA_TILES
+    for holder, tiles in [(SUPPLY, Tile.get_group_tiles(tile_supply))] + [(index, Player.get_tiles(players[index])) \
+            for index in range(len(players))]:
+        for tile in tiles:
+            tile_type = Tile.get_tile_type(tile)
+            if tile_type == Tile.PALACE_TILE:
+                batch.tile_holder[game, PALACE_TILES + Tile.get_tile_value(tile) - 1] = holder
+            elif tile_type == Tile.TOWER_TILE:
+                batch.tile_holder[game, TOWER_TILES + Tile.get_tile_value(tile) - 1] = holder
+                batch.tower_merchants[game, Tile.get_tile_value(tile) - 1] = Tile.get_num_merchants(tile)
+            else:
+                batch.tile_holder[game, tea] = holder
+                tea += 1
+    batch.current[game] = current_player
+    batch.turn[game] = turn
+    batch.moves_left[game] = 1 if turn < 2 else 2
+    batch.all_pass[game] = True
+    batch.no_moves[game] = 0
+    batch.done[game] = False
+
+def get_tower_masks(batch, games):
+    """Gets a mask of the locations next to the walls of each tower for some
+    games of a batch, shape (games, 4, rows, columns)."""
+    edges = get_tables(batch.rows, batch.columns)['edges']
+    walls = batch.walls[games]
+    towers = np.arange(4)
+    return edges[towers, 0, walls[:, :, 0]] | edges[towers, 1, walls[:, :, 1]]
+
+def get_wall_count(batch, games):
+    """Gets the number of walls orthogonal to each location for some games of
+    a batch, shape (games, rows, columns). Only the corners of the board can
+    be next to two walls."""
+    edges = get_tables(batch.rows, batch.columns)['edges']
+    walls = batch.walls[games]
+    towers = np.arange(4)
+    return edges[towers, 0, walls[:, :, 0]].sum(axis=1) + edges[towers, 1, walls[:, :, 1]].sum(axis=1)
+
+def get_building_towers(batch, games, buildings):
+    """Gets which towers a building of each of some games is next to, shape
+    (games, 4)."""
+    structure = batch.structure[games] == buildings[:, None, None]
+    return (get_tower_masks(batch, games) & structure[:, None]).any(axis=(-2, -1))
+
+def get_tower_buildings(batch, games, towers):
+    """Gets which buildings of each of some games are next to a tower, shape
+    (games, MAX_BUILDINGS)."""
+    tower_masks = get_tower_masks(batch, games)[np.arange(len(games)), towers]
+    structure = batch.structure[games][:, None] == np.arange(MAX_BUILDINGS)[None, :, None, None]
+    return (structure & tower_masks[:, None]).any(axis=(-2, -1))
+
+def get_legal_actions(batch):
+    """Gets a mask of the legal actions (see ActionSpace) of the current player
+    of each game, shape (games, actions). This follows
+    Agent.get_all_possible_moves. Games that are done have no legal
+    actions."""
+    rows = batch.rows
+    columns = batch.columns
+    cells = rows * columns
+    num_games = len(batch.done)
+    games = np.arange(num_games)
+    offsets = ActionSpace.get_action_offsets(rows, columns)
+    legal = np.zeros((num_games, ActionSpace.get_num_actions(rows, columns)), dtype=bool)
+    held = batch.held[games, batch.current]
+    masks = get_placement_masks(batch.planes)
+    masks[:, :NUM_COLORS] &= (held[:, HELD_BUILDINGS:HELD_STABLES] > 0)[:, :, None, None]
+    masks[:, NUM_COLORS] &= (held[:, HELD_STABLES] > 0)[:, None, None]
+    masks[:, NUM_COLORS + 1] &= (held[:, HELD_MERCHANTS] > 0)[:, None, None]
+    legal[:, :offsets[Move.ROOFTOP]] = masks.reshape(num_games, -1)
+    owned = batch.building_owner == batch.current[:, None]
+    active_pieces = batch.planes[:, ACTIVE_PLANE] != 0
+    for color in range(NUM_COLORS):
+        has_claimed = (owned & (batch.building_color == color)).any(axis=1)
+        can_claim = (batch.active[:, color] != NO_BUILDING) & ~has_claimed
+        rooftops = active_pieces & (batch.planes[:, BUILDING_PLANE + color] != 0) & \
+                can_claim[:, None, None]
+        start = offsets[Move.ROOFTOP] + color * cells
+        legal[:, start:start + cells] = rooftops.reshape(num_games, -1)
+    additions = get_tables(rows, columns)['additions']
+    walls = batch.walls
+    has_walls = held[:, HELD_WALLS] > 0
+    for tower in range(4):
+        for direction, partner, size in [(0, tower ^ 2, rows), (1, tower ^ 1, columns)]:
+            can_add = has_walls & (walls[:, tower, direction] + walls[:, partner, direction] < size - 1)
+            index = additions[tower, direction, walls[:, tower, direction]]
+            legal[games[can_add], offsets[Move.WALL] + index[can_add]] = True
+    has_tea = (batch.tile_holder[:, TEA_TILES:] == batch.current[:, None]).any(axis=1)
+    legal[:, offsets[Move.PASS]] = has_tea
+    legal[:, offsets[Move.NONE_POSSIBLE]] = ~legal.any(axis=1)
+    legal[batch.done] = False
+    return legal
+
+def give_tower_tiles(batch, games, towers, players):
+    """Gives the tower tiles of towers to players in some games, taking them
+    from the supply or from whoever holds them. The player gets the merchants
+    left on a tile. A tile given to the neutral player goes to the supply."""
+    neutral = players == NEUTRAL
+    batch.tile_holder[games, TOWER_TILES + towers] = np.where(neutral, SUPPLY, players)
+    games = games[~neutral]
+    towers = towers[~neutral]
+    np.add.at(batch.held, (games, players[~neutral], HELD_MERCHANTS),
+            batch.tower_merchants[games, towers])
+    batch.tower_merchants[games, towers] = 0
+
+def add_structure_location(batch, games, buildings, rows, columns):
+    """Adds a building piece or stable of a building to the structure and
+    coverage of some games."""
+    own = get_dilated_mask(batch.structure[games] == buildings[:, None, None])
+    added = np.zeros(own.shape, dtype=bool)
+    added[np.arange(len(games)), rows, columns] = True
+    batch.planes[games, COVERAGE_PLANE] += get_dilated_mask(added) & ~own
+    batch.structure[games, rows, columns] = buildings
+
+def place_buildings(batch, games, colors, rows, columns):
+    """Places a building piece of a color for the current player of some
+    games, starting a new building if there is no active building."""
+    buildings = batch.active[games, colors].astype(np.int64)
+    new = buildings == NO_BUILDING
+    buildings[new] = batch.num_buildings[games[new]]
+    batch.num_buildings[games[new]] += 1
+    batch.building_color[games[new], buildings[new]] = colors[new]
+    batch.active[games[new], colors[new]] = buildings[new]
+    add_structure_location(batch, games, buildings, rows, columns)
+    batch.building_size[games, buildings] += 1
+    batch.planes[games, BUILDING_PLANE + colors, rows, columns] = 1
+    batch.planes[games, ACTIVE_PLANE, rows, columns] = 1
+    batch.held[games, batch.current[games], HELD_BUILDINGS + colors] -= 1
+
+def place_stables(batch, games, rows, columns):
+    """Places a stable for the current player of some games. The stable is
+    part of the building it is attached to and gives its owner the tiles of any
+    tower the building is now next to."""
+    padded = np.pad(batch.structure[games], ((0, 0), (1, 1), (1, 1)), constant_values=NO_BUILDING)
+    index = np.arange(len(games))
+    buildings = np.max([padded[index, rows, columns + 1], padded[index, rows + 2, columns + 1],
+            padded[index, rows + 1, columns], padded[index, rows + 1, columns + 2]], axis=0).astype(np.int64)
+    before = get_building_towers(batch, games, buildings)
+    add_structure_location(batch, games, buildings, rows, columns)
+    batch.planes[games, STABLE_PLANE, rows, columns] = 1
+    owners = batch.building_owner[games, buildings].astype(np.int64)
+    planes = np.where(owners == NO_OWNER, ACTIVE_PLANE,
+            np.where(owners == NEUTRAL, NEUTRAL_PLANE, OWNER_PLANE + owners))
+    batch.planes[games, planes, rows, columns] = 1
+    batch.held[games, batch.current[games], HELD_STABLES] -= 1
+    new = get_building_towers(batch, games, buildings) & ~before
+    new &= (owners != NO_OWNER)[:, None]
+    pairs, towers = new.nonzero()
+    give_tower_tiles(batch, games[pairs], towers, owners[pairs])
+
+def place_merchants(batch, games, rows, columns):
+    """Places a merchant for the current player of some games. The merchant
+    is added to the active street if it is next to it, otherwise it starts a
+    new street."""
+    padded = np.pad(batch.planes[games, STREET_PLANE] != 0, ((0, 0), (1, 1), (1, 1)))
+    index = np.arange(len(games))
+    extends = padded[index, rows, columns + 1] | padded[index, rows + 2, columns + 1] | \
+            padded[index, rows + 1, columns] | padded[index, rows + 1, columns + 2]
+    batch.planes[games[~extends], STREET_PLANE] = 0
+    batch.planes[games, STREET_PLANE, rows, columns] = 1
+    batch.planes[games, MERCHANT_PLANE, rows, columns] = 1
+    batch.held[games, batch.current[games], HELD_MERCHANTS] -= 1
+
+def place_rooftops(batch, games, colors, rows, columns):
+    """Claims the active building of a color for the current player of some
+    games with a rooftop. The player gets the palace tile of the color if the
+    building is the largest of its color, tea tiles for a building of
+    TEA_COLOR and the tiles of the towers the building is next to. Once every
+    player has claimed a building of a color, nobody can place buildings of
+    that color anymore."""
+    players = batch.current[games]
+    buildings = batch.active[games, colors].astype(np.int64)
+    batch.building_owner[games, buildings] = players
+    batch.active[games, colors] = NO_BUILDING
+    batch.held[games, players, HELD_ROOFTOPS] -= 1
+    batch.planes[games, ROOFTOP_PLANE, rows, columns] = 1
+    structure = batch.structure[games] == buildings[:, None, None]
+    batch.planes[games, ACTIVE_PLANE] *= ~structure
+    batch.planes[games, OWNER_PLANE + players] += structure
+    batch.claimed[games, colors] += 1
+    everyone = games[batch.claimed[games, colors] == batch.num_players]
+    batch.held[everyone, :, HELD_BUILDINGS + colors[batch.claimed[games, colors] == batch.num_players]] = 0
+    same_color = batch.building_color[games] == colors[:, None]
+    same_color[np.arange(len(games)), buildings] = False
+    larger = same_color & (batch.building_size[games] >= batch.building_size[games, buildings][:, None])
+    largest = ~larger.any(axis=1)
+    batch.tile_holder[games[largest], PALACE_TILES + colors[largest]] = players[largest]
+    tea = colors == TEA_COLOR
+    if tea.any():
+        tea_games = games[tea]
+        num = (batch.building_color[tea_games] == TEA_COLOR).sum(axis=1)
+        supply = batch.tile_holder[tea_games, TEA_TILES:] == SUPPLY
+        taken = supply & (np.cumsum(supply, axis=1) <= (4 - num)[:, None])
+        holders = batch.tile_holder[tea_games, TEA_TILES:]
+        batch.tile_holder[tea_games, TEA_TILES:] = np.where(taken, players[tea][:, None], holders)
+    new = get_building_towers(batch, games, buildings)
+    pairs, towers = new.nonzero()
+    give_tower_tiles(batch, games[pairs], towers, players[pairs])
+
+def place_walls(batch, games, walls):
+    """Adds a wall for the current player of some games, walls are indices of
+    ActionSpace.get_wall_locations. If a claimed building is now next to the
+    tower of the wall, its owner gets the tile of the tower (the first such
+    building if there are several)."""
+    additions = get_tables(batch.rows, batch.columns)['additions']
+    index = np.arange(len(games))
+    towers = np.full(len(games), -1, dtype=np.int64)
+    directions = np.zeros(len(games), dtype=np.int64)
+    for tower in range(4):
+        for direction in [1, 0]:
+            match = (towers == -1) & \
+                    (additions[tower, direction, batch.walls[games, tower, direction]] == walls)
+            towers[match] = tower
+            directions[match] = direction
+    before = get_tower_buildings(batch, games, towers)
+    batch.walls[games, towers, directions] += 1
+    batch.held[games, batch.current[games], HELD_WALLS] -= 1
+    batch.planes[games, WALL_PLANE] = get_tower_masks(batch, games).any(axis=1)
+    new = get_tower_buildings(batch, games, towers) & ~before
+    has_new = new.any(axis=1)
+    first = np.argmax(new, axis=1)
+    owners = batch.building_owner[games, first].astype(np.int64)
+    gets = has_new & (owners != NO_OWNER)
+    give_tower_tiles(batch, games[gets], towers[gets], owners[gets])
+
+def pass_turns(batch, games):
+    """Uses a tea tile of the current player of some games to pass."""
+    tea = batch.tile_holder[games, TEA_TILES:] == batch.current[games][:, None]
+    first = np.argmax(tea, axis=1)
+    batch.tile_holder[games, TEA_TILES + first] = DISCARDED
+
+def step(batch, actions):
+    """Makes one move in each game of a batch that is not done. actions is an
+    array of the action (see ActionSpace) of each game, which must be legal.
+    Actions of games that are done are ignored."""
+    rows = batch.rows
+    columns = batch.columns
+    cells = rows * columns
+    offsets = ActionSpace.get_action_offsets(rows, columns)
+    playing = ~batch.done
+    games = np.arange(len(actions))
+    actions = np.asarray(actions)
+    def select(low, high):
+        """Gets the games that are playing with actions from low up to high."""
+        chosen = games[playing & (actions >= low) & (actions < high)]
+        return chosen, actions[chosen] - low
+    chosen, index = select(offsets[Move.BUILDING], offsets[Move.STABLE])
+    if len(chosen):
+        cell = index % cells
+        place_buildings(batch, chosen, index // cells, cell // columns, cell % columns)
+    chosen, index = select(offsets[Move.STABLE], offsets[Move.MERCHANT])
+    if len(chosen):
+        place_stables(batch, chosen, index // columns, index % columns)
+    chosen, index = select(offsets[Move.MERCHANT], offsets[Move.ROOFTOP])
+    if len(chosen):
+        place_merchants(batch, chosen, index // columns, index % columns)
+    chosen, index = select(offsets[Move.ROOFTOP], offsets[Move.WALL])
+    if len(chosen):
+        cell = index % cells
+        place_rooftops(batch, chosen, index // cells, cell // columns, cell % columns)
+    chosen, index = select(offsets[Move.WALL], offsets[Move.PASS])
+    if len(chosen):
+        place_walls(batch, chosen, index)
+    chosen, index = select(offsets[Move.PASS], offsets[Move.NONE_POSSIBLE])
+    if len(chosen):
+        pass_turns(batch, chosen)
+    end_moves(batch, playing, actions == offsets[Move.NONE_POSSIBLE])
+
+def end_moves(batch, playing, none_possible):
+    """Counts a move made by the games that are playing and ends the turns
+    that have no moves left, as in Game.run_game."""
+    batch.all_pass &= none_possible | ~playing
+    batch.moves_left -= playing
+    ended = playing & (batch.moves_left == 0)
+    batch.no_moves[ended] = np.where(batch.all_pass[ended], batch.no_moves[ended] + 1, 0)
+    over = (batch.claimed == batch.num_players).all(axis=1)
+    batch.done |= ended & ((batch.no_moves == batch.num_players) | over)
+    ended &= ~batch.done
+    batch.current[ended] = (batch.current[ended] + 1) % batch.num_players
+    batch.turn[ended] += 1
+    batch.moves_left[ended] = np.where(batch.turn[ended] < 2, 1, 2)
+    batch.all_pass[ended] = True
+
+def get_scores(batch):
+    """Gets the score of every player of each game as in Score, shape
+    (games, players)."""
+    num_games = len(batch.done)
+    games = np.arange(num_games)
+    scores = np.zeros((num_games, batch.num_players), dtype=np.int64)
+    for color in range(NUM_COLORS):
+        holder = batch.tile_holder[:, PALACE_TILES + color]
+        held = holder >= 0
+        scores[games[held], holder[held]] += color + 1
+    for tower in range(4):
+        holder = batch.tile_holder[:, TOWER_TILES + tower]
+        held = holder >= 0
+        scores[games[held], holder[held]] += tower + 1
+    wall_count = get_wall_count(batch, games)
+    bonus = batch.planes[:, WELL_BONUS_PLANE] != 0
+    merchants = batch.planes[:, MERCHANT_PLANE] != 0
+    for building in range(MAX_BUILDINGS):
+        owners = batch.building_owner[:, building]
+        owned = owners >= 0
+        if not owned.any():
+            continue
+        structure = batch.structure[owned] == building
+        score = structure.sum(axis=(1, 2)) + 4 * (structure & bonus[owned]).sum(axis=(1, 2))
+        score += (structure * wall_count[owned]).sum(axis=(1, 2))
+        score += (get_orthogonal_mask(structure) & merchants[owned]).sum(axis=(1, 2))
+        scores[games[owned], owners[owned]] += score
+    return scores
+
+def choose_random_actions(legal, rng):
+    """Chooses a legal action uniformly at random for each game, legal is a
+    mask made by get_legal_actions. Games without legal actions get action
+    0."""
+    picks = (rng.random(len(legal)) * legal.sum(axis=1)).astype(np.int64)
+    return np.argmax(np.cumsum(legal, axis=1, dtype=np.int16) > picks[:, None], axis=1)
+
+def play_random_games(batch, rng=None):
+    """Plays every game of a batch to the end with random moves and returns
+    the scores (see get_scores). rng is the NumPy random generator used to
+    choose moves."""
+    if rng == None:
+        rng = np.random.default_rng()
+    while not batch.done.all():
+        step(batch, choose_random_actions(get_legal_actions(batch), rng))
+    return get_scores(batch)
+
+if __name__ == "__main__":
+    import sys
+    import time
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    num_players = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = np.random.default_rng(int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    start = time.perf_counter()
+    batch = make_batch(num_games, num_players, rng=rng)
+    scores = play_random_games(batch, rng)
+    seconds = time.perf_counter() - start
+    print("%d games of %d players in %.2f seconds, %.1f games per second" % \
+            (num_games, num_players, seconds, num_games / seconds))
+    print("mean scores by seat:", scores.mean(axis=0))
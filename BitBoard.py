@@ -0,0 +1,289 @@
+"""A bit board is a compact representation of the pieces on a board where
+each layer of pieces is saved as a python integer. Each location within the
+board is one bit of a layer, the bit for a location is at the index
+row * columns + column (see Location.make_index).
+
+A bit board has the following layers:
+colors: dictionary of {building color: bits of building pieces of that color}
+stables: bits of all the stables on the board
+merchants: bits of all the merchants on the board
+street: bits of the merchants in the active market street
+well: bit of the well
+
+A bit board also saves the pieces and stables of each building (in the same
+order as Board.get_buildings) and the index of the active building for each
+color so the rules for placing pieces can be checked.
+
+Checking if locations are orthogonal or adjacent to a set of locations or
+inside of the board are done with shifts and masks on a whole layer at once.
+This makes finding where pieces can be placed a few integer operations instead
+of set operations over every building.
+
+A board made with Board.make_board(rows, columns, use_bit_board=True) computes
+the placements it does not have cached with compute_building_piece_locations,
+compute_stable_piece_location and compute_merchant_place_locations, which
+make a bit board of the board and find the placements from it.
+
+>>> import Board, Building
+>>> board = Board.make_board(11, 16)
+>>> bits = make_bit_board(board)
+>>> get_merchant_place_locations(bits) == Board.get_merchant_place_locations(board)
+True
+>>> loc = sorted(get_building_piece_locations(bits, 'Grey'))[0]
+>>> Board.start_new_building(board, loc, 'Grey')
+>>> start_new_building(bits, loc, 'Grey')
+>>> get_building_piece_locations(bits, 'Grey') == \\
+...         Board.get_building_piece_locations(board, 'Grey')
+True
+>>> get_stable_piece_location(bits) == Board.get_stable_piece_location(board)
+True
+>>> bit_board = Board.make_board(11, 16, use_bit_board=True)
+>>> Board.uses_bit_board(bit_board)
+True
+>>> Board.get_merchant_place_locations(bit_board) == \\
+...         Board.compute_merchant_place_locations(bit_board)
+True
+"""
+
+import Board
+import Building
+import Market
+import Location
+import GameConstants
+
+_masks = {}
+
+def get_masks(rows, columns):
+    """Gets the masks used for shifting layers of a board of a given size.
+    Returns a tuple of (inside, not_first_column, not_last_column). The masks
+    are only made once per board size."""
+    key = (rows, columns)
+    if key not in _masks:
+        inside = (1 << (rows * columns)) - 1
+        first = 0
+        for row in range(rows):
+            first |= 1 << (row * columns)
+        last = first << (columns - 1)
+        _masks[key] = (inside, inside & ~first, inside & ~last)
+    return _masks[key]
+
+def make_bit_board(board):
+    """Makes a bit board with the same pieces as a board."""
+    rows = Board.get_rows(board)
+    columns = Board.get_columns(board)
+    bits = {'rows': rows, 'columns': columns,
+            'colors': {color: 0 for color in GameConstants.BUILDINGS_COLORS},
+            'stables': 0, 'merchants': 0, 'street': 0,
+            'well': get_bit(Board.get_well(board), columns),
+            'buildings': [], 'active': {color: None for color in GameConstants.BUILDINGS_COLORS}}
+    for building in Board.get_buildings(board):
+        color = Building.get_building_color(building)
+        pieces = get_locations_bits(Building.get_building_locations(building), columns)
+        stables = get_locations_bits(Building.get_stable_locations(building), columns)
+        bits['colors'][color] |= pieces
+        bits['stables'] |= stables
+        if not Building.has_owner(building):
+            bits['active'][color] = len(bits['buildings'])
+        bits['buildings'].append([pieces, stables])
+    for street in Market.get_streets(Board.get_market(board)):
+        bits['street'] = get_locations_bits(street, columns)
+        bits['merchants'] |= bits['street']
+    return bits
+
+def clone_bit_board(bits):
+    """Clones a bit board"""
+    return {'rows': bits['rows'], 'columns': bits['columns'],
+            'colors': bits['colors'].copy(), 'stables': bits['stables'],
+            'merchants': bits['merchants'], 'street': bits['street'],
+            'well': bits['well'],
+            'buildings': [building[:] for building in bits['buildings']],
+            'active': bits['active'].copy()}
+
+def get_bit(location, columns):
+    """Gets the bit for a single location."""
+    return 1 << Location.make_index(location, columns)
+
+def get_locations_bits(locations, columns):
+    """Gets the bits for a group of locations. All of the locations must be
+    within the board."""
+    bits = 0
+    for loc in locations:
+        bits |= 1 << Location.make_index(loc, columns)
+    return bits
+
+def get_bits_locations(bits, columns):
+    """Gets a set of the locations of all the bits set in bits."""
+    locations = set()
+    while bits:
+        low = bits & -bits
+        locations.add(Location.get_index_location(low.bit_length() - 1, columns))
+        bits ^= low
+    return locations
+
+def count_bits(bits):
+    """Counts the number of bits set."""
+    return bin(bits).count('1')
+
+def get_orthogonal_bits(bits, rows, columns):
+    """Gets the bits orthogonally adjacent to any of the given bits that are
+    inside of the board. This can include the given bits."""
+    inside, not_first, not_last = get_masks(rows, columns)
+    return ((bits >> columns) | (bits << columns) | ((bits & not_last) << 1) | \
+            ((bits & not_first) >> 1)) & inside
+
+def get_dilated_bits(bits, rows, columns):
+    """Gets the given bits along with all of the bits adjacent to them (all
+    eight directions) that are inside of the board."""
+    inside, not_first, not_last = get_masks(rows, columns)
+    row = bits | ((bits & not_last) << 1) | ((bits & not_first) >> 1)
+    return (row | (row >> columns) | (row << columns)) & inside
+
+def get_structure_bits(bits):
+    """Gets the bits of all building pieces and stables."""
+    structures = bits['stables']
+    for color in bits['colors']:
+        structures |= bits['colors'][color]
+    return structures
+
+def get_street_ends(street, rows, columns):
+    """Gets the bits of the merchants at the head and tail of a street, the
+    merchants with at most one other merchant orthogonal to them."""
+    inside, not_first, not_last = get_masks(rows, columns)
+    directions = [street >> columns, (street << columns) & inside,
+            (street & not_last) << 1, (street & not_first) >> 1]
+    crowded = 0
+    for i in range(len(directions)):
+        for j in range(i + 1, len(directions)):
+            crowded |= directions[i] & directions[j]
+    return street & ~crowded
+
+def get_possible_addition(bits):
+    """Gets the bits where a merchant can be added to the active street
+    following the rules of Market.get_possible_addition. This is not filtered
+    by the other pieces on the board."""
+    rows = bits['rows']
+    columns = bits['columns']
+    street = bits['street']
+    older = bits['merchants'] & ~street
+    ends = get_street_ends(street, rows, columns)
+    interior = street & ~ends
+    possible = get_orthogonal_bits(ends, rows, columns) & ~street
+    possible &= ~(get_orthogonal_bits(older, rows, columns) & ~older)
+    possible &= ~(get_orthogonal_bits(interior, rows, columns) & ~interior)
+    if count_bits(ends) == 2:
+        head = ends & -ends
+        possible &= ~(get_orthogonal_bits(head, rows, columns) & \
+                get_orthogonal_bits(ends ^ head, rows, columns))
+    return possible
+
+def get_building_piece_bits(bits, color):
+    """Gets the bits where a building piece of a color can be placed following
+    the rules of Board.get_building_piece_locations."""
+    rows = bits['rows']
+    columns = bits['columns']
+    inside = get_masks(rows, columns)[0]
+    active = bits['active'][color]
+    structures = get_structure_bits(bits)
+    if active == None:
+        possible = inside
+    else:
+        pieces, stables = bits['buildings'][active]
+        possible = get_orthogonal_bits(pieces, rows, columns) & ~pieces & ~stables
+        structures &= ~(pieces | stables)
+    possible &= ~bits['merchants']
+    possible &= ~get_dilated_bits(structures, rows, columns)
+    possible &= ~get_dilated_bits(bits['well'], rows, columns)
+    return possible
+
+def get_stable_piece_bits(bits):
+    """Gets the bits where a stable can be placed following the rules of
+    Board.get_stable_piece_location."""
+    rows = bits['rows']
+    columns = bits['columns']
+    structures = get_structure_bits(bits)
+    possible = 0
+    for pieces, stables in bits['buildings']:
+        others = structures & ~(pieces | stables)
+        possible |= get_orthogonal_bits(pieces, rows, columns) & ~pieces & ~stables & \
+                ~get_dilated_bits(others, rows, columns)
+    possible &= ~bits['merchants']
+    possible &= ~get_dilated_bits(bits['well'], rows, columns)
+    return possible
+
+def get_merchant_place_bits(bits):
+    """Gets the bits where a merchant can be placed following the rules of
+    Board.get_merchant_place_locations."""
+    rows = bits['rows']
+    columns = bits['columns']
+    blocked = get_structure_bits(bits) | bits['well']
+    possible = get_possible_addition(bits) & ~blocked
+    if possible:
+        return possible
+    merchants = bits['merchants']
+    return get_masks(rows, columns)[0] & ~blocked & ~merchants & \
+            ~get_orthogonal_bits(merchants, rows, columns)
+
+def get_building_piece_locations(bits, color):
+    """Gets a set of the locations where a building piece of a color can be
+    placed."""
+    return get_bits_locations(get_building_piece_bits(bits, color), bits['columns'])
+
+def get_stable_piece_location(bits):
+    """Gets a set of the locations where a stable can be placed."""
+    return get_bits_locations(get_stable_piece_bits(bits), bits['columns'])
+
+def get_merchant_place_locations(bits):
+    """Gets a set of the locations where a merchant can be placed."""
+    return get_bits_locations(get_merchant_place_bits(bits), bits['columns'])
+
+def compute_building_piece_locations(board, color):
+    """Computes the locations of a board where a building piece of a color
+    can be placed with a bit board. This gives the same frozen set as
+    Board.compute_building_piece_locations."""
+    return frozenset(get_building_piece_locations(make_bit_board(board), color))
+
+def compute_stable_piece_location(board):
+    """Computes the locations of a board where a stable can be placed with a
+    bit board. This gives the same frozen set as
+    Board.compute_stable_piece_location."""
+    return frozenset(get_stable_piece_location(make_bit_board(board)))
+
+def compute_merchant_place_locations(board):
+    """Computes the locations of a board where a merchant can be placed with a
+    bit board. This gives the same frozen set as
+    Board.compute_merchant_place_locations."""
+    return frozenset(get_merchant_place_locations(make_bit_board(board)))
+
+def start_new_building(bits, location, color):
+    """Starts a new active building of a color at a location."""
+    bit = get_bit(location, bits['columns'])
+    bits['colors'][color] |= bit
+    bits['active'][color] = len(bits['buildings'])
+    bits['buildings'].append([bit, 0])
+
+def attach_building_location(bits, location, color):
+    """Attaches a building piece to the active building of a color."""
+    bit = get_bit(location, bits['columns'])
+    bits['colors'][color] |= bit
+    bits['buildings'][bits['active'][color]][0] |= bit
+
+def attach_stable_location(bits, building_index, location):
+    """Attaches a stable to the building with the given index."""
+    bit = get_bit(location, bits['columns'])
+    bits['stables'] |= bit
+    bits['buildings'][building_index][1] |= bit
+
+def claim_building(bits, color):
+    """Marks that the active building of a color has been claimed."""
+    bits['active'][color] = None
+
+def add_merchant_to_market(bits, location):
+    """Adds a merchant to the active street or starts a new street if the
+    merchant cannot be added to the active street (see
+    Market.add_merchant_to_market)."""
+    bit = get_bit(location, bits['columns'])
+    if bit & get_possible_addition(bits):
+        bits['street'] |= bit
+    else:
+        bits['street'] = bit
+    bits['merchants'] |= bit
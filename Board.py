@@ -5,9 +5,47 @@ final scores.
 A board inclues multiple elements: buildings (contigious blocks of building
 pieces and stables), a market street (or streets), towers with walls branching
 off them, and a well.
+
+A board also keeps a grid of the piece at each location so finding the piece at
+a single location does not need to search every building and street. Pieces
+should be added to a board with start_new_building, place_building_piece,
+place_stable and place_merchant so the grid stays up to date. If the buildings
+or market of a board are changed directly, build_grid must be called again.
+
+Along with the grid, a board keeps the coverage of each location: the number
+of structures (buildings with their stables, and the well) that the location
+is part of or adjacent to. A stable can only be placed where a single
+building covers the location, so checking a location is a single lookup.
+
+A board also keeps the set of locations where a new market street can be
+started (empty locations not next to any merchant) so it does not need to be
+found again every time the active street is blocked.
+
+Buildings are indexed so they do not need to be searched: a board keeps the
+active building of each color and the buildings claimed by each owner. These
+are updated by start_new_building, claim_building, unclaim_building and
+remove_building.
+
+The locations where each type of piece can be placed are cached on the board.
+When a piece is placed, only the cached placements that the piece can change
+are updated or recomputed. Cached placements are frozen sets (or a tuple for
+walls) and are shared between clones of a board. The number of times the
+cache was used (hits) or had to compute placements (misses) is shared by a
+board and all of its clones. If a board is changed without the functions of
+this module, clear_placements must be called.
+
+Placements that are not cached are computed from the sets of locations of the
+buildings and streets, or from a bit board (see BitBoard) if the board was made
+with use_bit_board. Both give the same placements. Finding the piece at a
+single location always uses the grid.
+
+Boards, buildings, players and tiles are saved in classes with slots (such as
+BoardState) instead of dictionaries so each state uses less memory. They should
+only be read and changed with the functions of their modules.
 """
 
 import random
+import BitBoard
 from Player import *
 from Location import *
 from Building import *
@@ -15,31 +53,269 @@ from Market import *
 from Tower import *
 from Move import *
 
+class BoardState:
+    """The pieces, grids and caches of a board. This should only be used
+    through the functions of this module."""
+    __slots__ = ('rows', 'columns', 'buildings', 'active', 'owned', 'market',
+            'towers', 'well', 'grid', 'coverage', 'street_starts', 'hash',
+            'placements', 'placement_stats', 'use_bit_board')
 
-def make_board(rows, columns):
+def make_board(rows, columns, rng=random, use_bit_board=False):
     """Makes a board with a default game setup,
     One well will be randomly placed.
     A set of towers will be made.
     A market will be created with a randomly placed merchant.
 
     A board has Buildings, a market, towers, and a well
+
+    rng is the random number generator used to place the well and merchant,
+    the random module by default. If use_bit_board is True, placements are
+    computed with a bit board.
     """
-    well_location = random_central_location(rows, columns)
-    market_start = random_central_location(rows, columns)
+    well_location = random_central_location(rows, columns, rng)
+    market_start = random_central_location(rows, columns, rng)
     while market_start == well_location:
-        market_start = random_central_location(rows, columns)
-
-    return {'Rows':rows, 'Columns':columns, 'Buildings':[], \
-        'Market':make_market(market_start), 'Towers':make_towers(rows, columns), \
-        'Well':well_location}
+        market_start = random_central_location(rows, columns, rng)
+
+    board = BoardState()
+    board.rows = rows
+    board.columns = columns
+    board.buildings = []
+    board.market = make_market(market_start)
+    board.towers = make_towers(rows, columns)
+    board.well = well_location
+    board.hash = None
+    board.placements = {}
+    board.placement_stats = {'hits':0, 'misses':0}
+    board.use_bit_board = use_bit_board
+    build_grid(board)
+    return board
 
 def clone_board(board):
-    """makes a deep clone of a board"""
-    return {'Rows':get_rows(board), 'Columns':get_columns(board), \
-        'Buildings':[clone_building(building) for building in get_buildings(board)], \
-        'Market':clone_market(get_market(board)),
-        'Towers':clone_towers(get_towers(board)),
-        'Well':get_well(board)}
+    """Makes a clone of a board. Everything that is replaced instead of
+    changed when a piece is placed (the rows of the grid and coverage, the
+    locations of buildings and streets, towers and cached placements) is shared
+    with the clone, so a clone only uses memory for what changes after it is
+    made."""
+    clone = BoardState()
+    clone.rows = board.rows
+    clone.columns = board.columns
+    clone.buildings = [clone_building(building) for building in board.buildings]
+    copies = dict(zip(board.buildings, clone.buildings))
+    clone.active = {color: copies[building] for color, building in board.active.items()}
+    clone.owned = {owner: [copies[building] for building in buildings] \
+            for owner, buildings in board.owned.items()}
+    clone.market = clone_market(board.market)
+    clone.towers = share_towers(board.towers)
+    clone.well = board.well
+    clone.grid = board.grid[:]
+    clone.coverage = board.coverage[:]
+    clone.street_starts = board.street_starts
+    clone.hash = board.hash
+    clone.placements = board.placements.copy()
+    clone.placement_stats = board.placement_stats
+    clone.use_bit_board = board.use_bit_board
+    return clone
+
+def build_grid(board):
+    """Builds the grid of pieces, the coverage and the building indexes for a
+    board from its buildings, market and well. The grid is a list of rows
+    where each row is a list of the piece at each column (as defined in Move)
+    or None if the location is empty. The coverage is a list of rows where
+    each row is a list of the number of structures covering each column. Once
+    built, each row is saved as a tuple and replaced when it changes so rows
+    can be shared between clones of the board."""
+    grid = [[None] * get_columns(board) for row in range(get_rows(board))]
+    for street in get_streets(get_market(board)):
+        for loc in street:
+            grid[get_row(loc)][get_column(loc)] = MERCHANT
+    for building in get_buildings(board):
+        for loc in get_building_locations(building):
+            grid[get_row(loc)][get_column(loc)] = BUILDING
+        for loc in get_stable_locations(building):
+            grid[get_row(loc)][get_column(loc)] = STABLE
+    well = get_well(board)
+    grid[get_row(well)][get_column(well)] = WELL
+    board.grid = [tuple(row) for row in grid]
+    board.coverage = [(0,) * get_columns(board) for row in range(get_rows(board))]
+    change_coverage(board, get_covered_locations([well]), 1)
+    for building in get_buildings(board):
+        change_coverage(board, get_covered_locations(get_building_and_stables(building)), 1)
+    board.street_starts = frozenset([loc for loc in get_all_locations(board) \
+            if is_street_start(board, loc)])
+    index_buildings(board)
+
+def index_buildings(board):
+    """Builds the index of the active building of each color and the
+    buildings claimed by each owner from the buildings of a board."""
+    board.active = {}
+    board.owned = {}
+    for building in get_buildings(board):
+        if has_owner(building):
+            board.owned.setdefault(get_owner(building), []).append(building)
+        else:
+            board.active[get_building_color(building)] = building
+
+def get_grid(board):
+    """Gets the grid of pieces of a board."""
+    return board.grid
+
+def set_grid_piece(board, location, piece):
+    """Sets the piece at a location in the grid of a board. The row of the
+    location is replaced."""
+    grid = get_grid(board)
+    row = get_row(location)
+    column = get_column(location)
+    grid[row] = grid[row][:column] + (piece,) + grid[row][column + 1:]
+
+def get_coverage(board):
+    """Gets the coverage of a board."""
+    return board.coverage
+
+def get_covered_locations(locations):
+    """Gets a set of the locations that are part of or adjacent to any of the
+    given locations."""
+    covered = set(locations)
+    for loc in locations:
+        covered.update(get_adjacent(loc))
+    return covered
+
+def change_coverage(board, locations, change):
+    """Adds change to the coverage of each location within the board. Each
+    row with a changed location is replaced."""
+    coverage = get_coverage(board)
+    rows = get_rows(board)
+    columns = get_columns(board)
+    changed = {}
+    for loc in locations:
+        if is_within_bounds(loc, rows, columns):
+            row = get_row(loc)
+            if row not in changed:
+                changed[row] = list(coverage[row])
+            changed[row][get_column(loc)] += change
+    for row in changed:
+        coverage[row] = tuple(changed[row])
+
+def get_new_coverage(building, location):
+    """Gets the locations covered by a location of a building that are not
+    covered by any other part of the building."""
+    others = get_building_and_stables(building).difference([location])
+    return [near for near in get_covered_locations([location]) if near not in others \
+            and not any(adj in others for adj in get_adjacent(near))]
+
+def get_street_starts(board):
+    """Gets a frozen set of the locations where a new market street can be
+    started."""
+    return board.street_starts
+
+def is_street_start(board, location):
+    """Checks if a new market street can be started at a location. The
+    location must be an empty location within the board that is not
+    orthogonal to a merchant."""
+    rows = get_rows(board)
+    columns = get_columns(board)
+    grid = get_grid(board)
+    if not is_within_bounds(location, rows, columns) or \
+            grid[get_row(location)][get_column(location)] != None:
+        return False
+    for orth in get_orthogonal_within_bounds(location, rows, columns):
+        if grid[get_row(orth)][get_column(orth)] == MERCHANT:
+            return False
+    return True
+
+def refresh_street_starts(board, locations):
+    """Checks again if new market streets can be started at the given
+    locations after the pieces at or next to them have changed."""
+    starts = get_street_starts(board)
+    added = []
+    removed = []
+    for loc in locations:
+        if is_street_start(board, loc):
+            if loc not in starts:
+                added.append(loc)
+        elif loc in starts:
+            removed.append(loc)
+    if added or removed:
+        board.street_starts = starts.difference(removed).union(added)
+
+def get_hash(board):
+    """Gets the hash of the game state saved on a board (see Zobrist), or None
+    if it has not been computed."""
+    return board.hash
+
+def set_hash(board, value):
+    """Sets the hash of the game state saved on a board."""
+    board.hash = value
+
+def get_placements(board):
+    """Gets the cached placements of a board as a dictionary of
+    {(BUILDING, color) or STABLE or MERCHANT or WALL: placements}."""
+    return board.placements
+
+def set_placements(board, placements):
+    """Replaces the cached placements of a board."""
+    board.placements = placements
+
+def clear_placements(board):
+    """Clears all cached placements of a board."""
+    set_placements(board, {})
+
+def uses_bit_board(board):
+    """Checks if the placements of a board are computed with a bit board."""
+    return board.use_bit_board
+
+def get_placement_stats(board):
+    """Gets the hits and misses of the placement cache of a board as a
+    dictionary of {'hits': hits, 'misses': misses}."""
+    return board.placement_stats
+
+def get_cached_placements(board, key, compute):
+    """Gets the placements for a key from the cache of a board or computes
+    them with compute (a function of the board) if they are not cached."""
+    placements = get_placements(board)
+    stats = get_placement_stats(board)
+    if key in placements:
+        stats['hits'] += 1
+        return placements[key]
+    stats['misses'] += 1
+    placements[key] = compute(board)
+    return placements[key]
+
+def update_placements(board, piece, location, color=None):
+    """Updates the cached placements of a board after a piece (BUILDING,
+    STABLE or MERCHANT) is placed at a location. color is the color of the
+    active building the piece was added to, or None if the piece is a merchant
+    or a stable attached to a claimed building."""
+    placements = get_placements(board)
+    near = frozenset(get_adjacent(location)).union([location])
+    updated = {}
+    for key in placements:
+        value = placements[key]
+        if key == WALL:
+            updated[key] = value
+        elif key == MERCHANT:
+            #Merchants are recomputed if the active street may have changed
+            if piece != MERCHANT and (location not in value or len(value) > 1):
+                updated[key] = value.difference([location])
+        elif piece == MERCHANT:
+            updated[key] = value.difference([location])
+        elif key == STABLE:
+            #Stables can be attached to any building, so they are recomputed
+            pass
+        elif key[1] != color:
+            #The piece is part of another building for this color
+            updated[key] = value - near
+        elif piece == STABLE:
+            updated[key] = value.difference([location])
+    set_placements(board, updated)
+
+def forget_placements(board, key):
+    """Removes the cached placements for a key from a board."""
+    placements = get_placements(board)
+    if key in placements:
+        updated = placements.copy()
+        del updated[key]
+        set_placements(board, updated)
 
 def get_piece(board, location):
     """Gets a piece at a given location with from a board. The piece type
@@ -47,43 +323,35 @@ def get_piece(board, location):
     row = get_row(location)
     col = get_column(location)
     assert 0 <= row < get_rows(board) and 0 <= col < get_columns(board)
-    if market_contains_location(get_market(board),(board)):
-        return MERCHANT
-    for building in get_buildings(board):
-        if location in get_stable_locations(building):
-            return STABLE
-        elif building_contains_location(building, location):
-            return BUILDING
-    if location == get_well(board):
-        return WELL
-
-def random_central_location(rows, columns):
+    return get_grid(board)[row][col]
+
+def random_central_location(rows, columns, rng=random):
 	"""Creates a random location in the center part of town: Not touching a wall"""
-	return make_location(random.randrange(rows - 2) + 1, random.randrange(columns - 2) + 1)
+	return make_location(rng.randrange(rows - 2) + 1, rng.randrange(columns - 2) + 1)
 
 def get_rows(board):
     """Gets the number of rows in a board."""
-    return board['Rows']
+    return board.rows
 
 def get_columns(board):
     """Gets the number of columns in a board."""
-    return board['Columns']
+    return board.columns
 
 def get_buildings(board):
     """Gets the buildings on a board."""
-    return board['Buildings']
+    return board.buildings
 
 def get_market(board):
     """Gets the market in a board."""
-    return board['Market']
+    return board.market
 
 def get_towers(board):
     """Gets the towers and walls in a board."""
-    return board['Towers']
+    return board.towers
 
 def get_well(board):
     """Gets the location of the well on a board."""
-    return board['Well']
+    return board.well
 
 def get_all_locations(board):
     """Gets a set of all locations in a board."""
@@ -93,7 +361,15 @@ def get_all_locations(board):
 
 def get_buildings_claimed_by(board, player_name):
     """Gets all the buildings claimed by a player with the given name."""
-    return [building for building in get_buildings(board) if get_owner(building) == player_name]
+    return list(board.owned.get(player_name, ()))
+
+def has_claimed_color(board, player_name, color):
+    """Checks if a player with the given name has claimed a building of a
+    color."""
+    for building in board.owned.get(player_name, ()):
+        if get_building_color(building) == color:
+            return True
+    return False
 
 def get_bounded_set(board, location_set):
     """Gets a set of all locations in location_set that are within the bounds
@@ -107,31 +383,46 @@ def get_bounded_set(board, location_set):
     return bounded
 
 def get_stable_piece_location(board):
-    """Gets all the locations in which a stable can be attached to a building"""
+    """Gets all the locations in which a stable can be attached to a building
+    as a frozen set. This uses the placements cached on the board."""
+    if uses_bit_board(board):
+        return get_cached_placements(board, STABLE, BitBoard.compute_stable_piece_location)
+    return get_cached_placements(board, STABLE, compute_stable_piece_location)
+
+def compute_stable_piece_location(board):
+    """Computes all the locations in which a stable can be attached to a
+    building. A stable can be attached to an empty location orthogonal to a
+    building if no other building or the well covers the location."""
     possible = set()
+    grid = get_grid(board)
+    coverage = get_coverage(board)
+    rows = get_rows(board)
+    columns = get_columns(board)
     for building in get_buildings(board):
-        temp = set(get_building_peice_attach(building))
-        for building2 in get_buildings(board):
-            if building2 != building:
-                temp = temp.difference(set(get_building_and_stables(building2)))
-                temp = temp.difference(set(get_building_stable_adjacent(building2)))
-        possible = possible.union(temp)
-    for street in get_market(board):
-        for loc in street:
-            if loc in possible:
-                possible.remove(loc)
-    well = get_well(board)
-    if well in possible:
-        possible.remove(well)
-    possible -= set(get_adjacent(get_well(board)))
-    return get_bounded_set(board, possible)
+        for loc in get_building_peice_attach(building):
+            if is_within_bounds(loc, rows, columns):
+                row = get_row(loc)
+                col = get_column(loc)
+                if coverage[row][col] == 1 and grid[row][col] == None:
+                    possible.add(loc)
+    return frozenset(possible)
 
 def get_building_piece_locations(board, color):
     """Gets all the locations in which a building piece can be attached for a
-    specific color. If there is no building of this color currently active,
-    this will return all open locations on the board that are not adjacent to
-    a structure. This will return an empty list if nothing can be attached to
-    the building."""
+    specific color as a frozen set. This uses the placements cached on the
+    board."""
+    compute = compute_building_piece_locations
+    if uses_bit_board(board):
+        compute = BitBoard.compute_building_piece_locations
+    return get_cached_placements(board, (BUILDING, color),
+            lambda board: compute(board, color))
+
+def compute_building_piece_locations(board, color):
+    """Computes all the locations in which a building piece can be attached
+    for a specific color. If there is no building of this color currently
+    active, this will return all open locations on the board that are not
+    adjacent to a structure. This will return an empty set if nothing can be
+    attached to the building."""
     active = get_active_building(board, color)
     #If there is no active buidling, return all open locations
     possible = set()
@@ -140,7 +431,7 @@ def get_building_piece_locations(board, color):
     else:
         possible = get_building_peice_attach(active)
         possible = get_bounded_set(board, possible)
-    for street in get_market(board):
+    for street in get_streets(get_market(board)):
         possible -= set(street);
     for building in get_buildings(board):
         if building != active:
@@ -155,7 +446,7 @@ def get_building_piece_locations(board, color):
     if well in possible:
         possible.remove(well)
     possible -= set(get_adjacent(get_well(board)))
-    return get_bounded_set(board, possible);
+    return frozenset(get_bounded_set(board, possible))
 
 def can_place_building_piece(board, location, color):
     """Checks if a piece can be added to a board at a specific location. This
@@ -184,7 +475,131 @@ def can_place_building_piece(board, location, color):
 
 def start_new_building(board, location, color):
     """Starts a new building at a given location."""
-    get_buildings(board).append(make_building(color, location))
+    building = make_building(color, location)
+    get_buildings(board).append(building)
+    board.active[color] = building
+    set_grid_piece(board, location, BUILDING)
+    change_coverage(board, get_covered_locations([location]), 1)
+    refresh_street_starts(board, [location])
+    update_placements(board, BUILDING, location, color)
+
+def place_building_piece(board, building, location):
+    """Attaches a building piece to a building on the board."""
+    attach_building_locations(building, location)
+    set_grid_piece(board, location, BUILDING)
+    change_coverage(board, get_new_coverage(building, location), 1)
+    refresh_street_starts(board, [location])
+    update_placements(board, BUILDING, location, get_building_color(building))
+
+def place_stable(board, building, location):
+    """Attaches a stable to a building on the board."""
+    attach_stable_location(building, location)
+    set_grid_piece(board, location, STABLE)
+    change_coverage(board, get_new_coverage(building, location), 1)
+    refresh_street_starts(board, [location])
+    color = None
+    if not has_owner(building):
+        color = get_building_color(building)
+    update_placements(board, STABLE, location, color)
+
+def place_merchant(board, location):
+    """Adds a merchant to the market of the board."""
+    add_merchant_to_market(get_market(board), location)
+    set_grid_piece(board, location, MERCHANT)
+    refresh_street_starts(board, [location] + get_orthogonal(location))
+    update_placements(board, MERCHANT, location)
+
+def claim_building(board, building, player, color, rooftop=None, rng=random):
+    """Claims a building on the board for a player (see assign_owner)."""
+    assign_owner(building, player, color, rooftop, rng)
+    if board.active.get(get_building_color(building)) is building:
+        del board.active[get_building_color(building)]
+    board.owned.setdefault(player, []).append(building)
+    forget_placements(board, (BUILDING, get_building_color(building)))
+
+def add_wall(board, location):
+    """Adds a wall at a location to the tower that can be extended to that
+    location. Returns the number of the tower the wall was added to and
+    True if the wall was added to the columns of the tower or False if it was
+    added to the rows, or None if no tower can be extended to the location."""
+    towers = get_towers(board)
+    for num in range(1, 5):
+        if location == get_tower_addition_c(towers, num):
+            change_tower(board, num, add_tower_c)
+            forget_placements(board, WALL)
+            return num, True
+        elif location == get_tower_addition_r(towers, num):
+            change_tower(board, num, add_tower_r)
+            forget_placements(board, WALL)
+            return num, False
+    return None
+
+def remove_building(board, building):
+    """Removes a building started with start_new_building from the board."""
+    get_buildings(board).remove(building)
+    if board.active.get(get_building_color(building)) is building:
+        del board.active[get_building_color(building)]
+    for loc in get_building_and_stables(building):
+        set_grid_piece(board, loc, None)
+    change_coverage(board, get_covered_locations(get_building_and_stables(building)), -1)
+    refresh_street_starts(board, get_building_and_stables(building))
+    clear_placements(board)
+
+def remove_building_piece(board, building, location):
+    """Removes a building piece added with place_building_piece."""
+    change_coverage(board, get_new_coverage(building, location), -1)
+    detach_building_location(building, location)
+    set_grid_piece(board, location, None)
+    refresh_street_starts(board, [location])
+    clear_placements(board)
+
+def remove_stable(board, building, location):
+    """Removes a stable added with place_stable."""
+    change_coverage(board, get_new_coverage(building, location), -1)
+    detach_stable_location(building, location)
+    set_grid_piece(board, location, None)
+    refresh_street_starts(board, [location])
+    clear_placements(board)
+
+def remove_merchant(board, location):
+    """Removes a merchant added with place_merchant."""
+    remove_merchant_from_market(get_market(board), location)
+    set_grid_piece(board, location, None)
+    refresh_street_starts(board, [location] + get_orthogonal(location))
+    clear_placements(board)
+
+def unclaim_building(board, building):
+    """Removes the owner of a building claimed with claim_building."""
+    owned = board.owned[get_owner(building)]
+    owned.remove(building)
+    if not owned:
+        del board.owned[get_owner(building)]
+    remove_owner(building)
+    board.active[get_building_color(building)] = building
+    clear_placements(board)
+
+def remove_wall(board, tower_number, is_column):
+    """Removes a wall added with add_wall from a tower."""
+    if is_column:
+        change_tower(board, tower_number, remove_tower_c)
+    else:
+        change_tower(board, tower_number, remove_tower_r)
+    clear_placements(board)
+
+def change_tower(board, tower_number, change):
+    """Changes a tower of a board with a function of the tower (such as
+    add_tower_c). The tower is cloned first and replaced as towers are shared
+    between clones of a board."""
+    towers = get_towers(board)
+    tower = clone_tower(get_tower(towers, tower_number))
+    change(tower)
+    set_tower(towers, tower_number, tower)
+
+def get_wall_piece_locations(board):
+    """Gets all the locations in which a wall can be added as a tuple. This
+    uses the placements cached on the board."""
+    return get_cached_placements(board, WALL,
+            lambda board: tuple(get_possible_wall_additions(get_towers(board))))
 
 def is_adjacent_to_structure(board, location):
     """Checks if the location is adjacent to the well or a building. This
@@ -216,47 +631,37 @@ def can_place_on_current_street(board):
     return len(possible) > 0
 
 def get_merchant_place_locations(board):
-    """This will get all the locations on the board in which a merchant can be
+    """Gets all the locations on the board in which a merchant can be placed
+    as a frozen set. This uses the placements cached on the board."""
+    if uses_bit_board(board):
+        return get_cached_placements(board, MERCHANT, BitBoard.compute_merchant_place_locations)
+    return get_cached_placements(board, MERCHANT, compute_merchant_place_locations)
+
+def compute_merchant_place_locations(board):
+    """This will compute all the locations on the board in which a merchant can be
     placed. If the market street has open locations at the head or tail of the
     street, this will return possible open locations. If the market street does
     not have open locations to attach a merchant, this will return every open
     location on the board in which a new street can be started. """
     market = get_market(board)
+    grid = get_grid(board)
     #Get possible additions to current active street.
     possible = get_possible_addition(market)
-    #Filter out locations already occupied
-    possible = get_bounded_set(board, possible)
-    for building in get_buildings(board):
-        possible -= set(get_building_and_stables(building))
-    well = get_well(board)
-    if well in possible:
-        possible.remove(well)
+    #Filter out locations already occupied by buildings, stables or the well
+    possible = [loc for loc in get_bounded_set(board, possible) \
+            if grid[get_row(loc)][get_column(loc)] in (None, MERCHANT)]
     #If there are open spaces, return the open spaces.
     if len(possible) > 0:
-        return possible
-    #If there are no open spaces, get all the locations.
-    possible = set(get_all_locations(board))
-    #Remove currently occupied locations and locations next to the streets.
-    for street in market:
-        possible -= set(street)
-        possible -= set(get_adjacent_to_street(street))
-    for building in get_buildings(board):
-        possible -= set(get_building_and_stables(building))
-    if well in possible:
-        possible.remove(well)
-    return get_bounded_set(board, possible)
+        return frozenset(possible)
+    #If there are no open spaces, a new street can be started.
+    return get_street_starts(board)
 
 def is_location_empty(board, location):
     """Checks if a location is empty on the board. This checks if the location
     is part of the market, building, or well."""
-    if location == get_well(board):
-        return False;
-    for building in get_buildings(board):
-        if buliding_contans_location_stables(building, location):
-            return False
-    if market_contains_location(market, location):
-        return False
-    return True
+    if not is_within_bounds(location, get_rows(board), get_columns(board)):
+        return True
+    return get_grid(board)[get_row(location)][get_column(location)] == None
 
 def get_buildings_by_color(board, color):
     """Gets all the buildings of a specified color on a board. This will return
@@ -266,30 +671,23 @@ def get_buildings_by_color(board, color):
 def get_active_building(board, color):
     """Gets the active building of a color (aka, it doesn't have an owner), or
     None if there is no active building of that color."""
-    for building in get_buildings_by_color(board, color):
-        if not has_owner(building):
-            return building
-    return None
+    return board.active.get(color)
 
 def get_num_walls_adjacent_to_building(board, building):
     """Gets the number of walls orthogonally adjacent to a given building."""
-    wall_locations = get_wall_locations(get_towers(board))
+    towers = get_towers(board)
     count = 0
-    orthogonal = get_building_stable_orthogonal(building)
-    for wall in wall_locations:
-        if wall in orthogonal:
+    for loc in get_building_stable_orthogonal(building):
+        if is_wall_location(towers, loc):
             count += 1
     return count
 
 def get_num_merchants_adjacent_to_building(board, building):
     """Gets the number of merchants orthogonally adjacent to a given buidling."""
-    merchant_locations = []
-    for street in get_market(board):
-        merchant_locations += street
     count = 0
-    orthogonal = get_building_stable_orthogonal(building)
-    for merchant in merchant_locations:
-        if merchant in orthogonal:
+    for loc in get_building_stable_orthogonal(building):
+        if is_within_bounds(loc, get_rows(board), get_columns(board)) and \
+                get_piece(board, loc) == MERCHANT:
             count += 1
     return count
 
@@ -378,7 +378,7 @@ class BoardCanvas(tkinter.Tk):
 
     def update_board(self):
         """Updates the displayed board based on self.board"""
-        for street in Board.get_market(self.board):
+        for street in Market.get_streets(Board.get_market(self.board)):
             for loc in street:
                 current = self.check_placed_piece(loc)
                 if current != None and current[0] != MERCHANT:
@@ -395,7 +395,7 @@ class BoardCanvas(tkinter.Tk):
         tea_tiles = {}
         tower_merchants = []
 
-        temp_tiles = [tile for tile in self.tile_supply if Tile.get_tile_type(tile) == Tile.TOWER_TILE]
+        temp_tiles = Tile.get_group_tiles_of_type(self.tile_supply, Tile.TOWER_TILE)
         for t in temp_tiles:
             tower_tiles[Tile.get_tile_value(t)] = t
             tower_merchants.extend([(Tile.get_tile_value(t), m) for m in range(Tile.get_num_merchants(t))])
@@ -415,7 +415,7 @@ class BoardCanvas(tkinter.Tk):
             if merchant not in self.drawn_tower_merchants:
                 self.drawn_tower_merchants[merchant] = self.draw_tower_tile_merchant(merchant[0], merchant[1])
 
-        temp_tiles = [tile for tile in self.tile_supply if Tile.get_tile_type(tile) == Tile.PALACE_TILE]
+        temp_tiles = Tile.get_group_tiles_of_type(self.tile_supply, Tile.PALACE_TILE)
         for t in temp_tiles:
             palace_tiles[Tile.get_tile_value(t)] = t
         for key in list(self.drawn_palace_tiles.keys()):
@@ -426,7 +426,7 @@ class BoardCanvas(tkinter.Tk):
             if Tile.get_tile_value(t) not in self.drawn_palace_tiles:
                 self.drawn_palace_tiles[Tile.get_tile_value(t)] = self.draw_palace_tile(Tile.get_tile_value(t))
 
-        temp_tiles = [tile for tile in self.tile_supply if Tile.get_tile_type(tile) == Tile.TEA_TILE]
+        temp_tiles = Tile.get_group_tiles_of_type(self.tile_supply, Tile.TEA_TILE)
         for i in range(len(temp_tiles)):
             tea_tiles[i] = temp_tiles[i]
         for key in list(self.drawn_tea_tiles.keys()):
@@ -825,23 +825,23 @@ if __name__ == "__main__":
             poss = list(Board.get_building_piece_locations(board, color))
             if poss:
                 sel = random.choice(poss)
-                Building.attach_building_locations(building, sel)
+                Board.place_building_piece(board, building, sel)
         for i in range(1):
             poss = list(Board.get_building_piece_locations(board, color))
             if poss:
                 sel = random.choice(poss)
-                Building.attach_stable_location(building, sel)
+                Board.place_stable(board, building, sel)
         for i in range(5):
             poss = list(Board.get_building_piece_locations(board, color))
             if poss:
                 sel = random.choice(poss)
-                Building.attach_building_locations(building, sel)
+                Board.place_building_piece(board, building, sel)
 
     for i in range(15):
         poss = list(Board.get_merchant_place_locations(board))
         if poss:
             sel = random.choice(poss)
-            Market.add_merchant_to_market(market, sel)
+            Board.place_merchant(board, sel)
 
     #print(Board.get_well(board_canvas.board))
     towers = Board.get_towers(board_canvas.board)
@@ -867,7 +867,7 @@ if __name__ == "__main__":
     Tower.add_tower_r(tower4)
 
     orange = Board.get_active_building(board, 'Orange')
-    Building.assign_owner(orange, 'Nick', 'Red')
+    Board.claim_building(board, orange, 'Nick', 'Red')
 
     board_canvas.update_board()
 
@@ -880,7 +880,7 @@ if __name__ == "__main__":
             if Board.get_active_building(board, 'Orange') == None:
                 Board.start_new_building(board, sel, 'Orange')
             else:
-                Building.attach_building_locations(Board.get_active_building(board, 'Orange'), sel)
+                Board.place_building_piece(board, Board.get_active_building(board, 'Orange'), sel)
         board_canvas.update_board()
         threading.Timer(3, foo).start()
 
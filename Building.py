@@ -4,7 +4,11 @@ stables.
 
 A building can only have building pieces added to it if it does not have an
 owner. A stable can be added to a building at any time. When adding to a
-building, a gap must be left between buildings and the well."""
+building, a gap must be left between buildings and the well.
+
+A building keeps frozen sets of the locations next to it. These are updated
+when a building piece or stable is attached so they are never found again from
+all the locations of the building when they are read."""
 
 from Player import *
 from Location import *
@@ -12,132 +16,193 @@ import random
 
 NEUTRAL_OWNER = ()
 
+class BuildingState:
+    """The pieces, owner and neighbor sets of a building. This should only
+    be used through the functions of this module."""
+    __slots__ = ('color', 'locations', 'stables', 'owner', 'owner_color',
+            'rooftop', 'structure', 'orthogonal', 'adjacent',
+            'stable_orthogonal', 'stable_adjacent', 'attach')
+
+    def __init__(self, color):
+        self.color = color
+        self.locations = ()
+        self.stables = ()
+        self.owner = None
+        self.owner_color = None
+        self.rooftop = None
+        clear_geometry(self)
+
 def make_building(color, start):
     """Makes a building of a given color starting at a location."""
-    return {'color':color,
-            'locations':[start],
-            'stables':[],
-            'owner':None,
-            'owner_color':None,
-            'rooftop':None}
+    building = BuildingState(color)
+    attach_building_locations(building, start)
+    return building
 
 def clone_building(building):
-    """Clones a building"""
-    return {'color': get_building_color(building),
-            'locations': get_building_locations(building)[:],
-            'stables': get_stable_locations(building)[:],
-            'owner': get_owner(building),
-            'owner_color': get_owner_color(building),
-            'rooftop': get_rooftop_location(building)}
+    """Clones a building. The locations and neighbor sets of a building are
+    never changed in place so they are shared with the clone."""
+    clone = BuildingState.__new__(BuildingState)
+    clone.color = building.color
+    clone.locations = building.locations
+    clone.stables = building.stables
+    clone.owner = building.owner
+    clone.owner_color = building.owner_color
+    clone.rooftop = building.rooftop
+    clone.structure = building.structure
+    clone.orthogonal = building.orthogonal
+    clone.adjacent = building.adjacent
+    clone.stable_orthogonal = building.stable_orthogonal
+    clone.stable_adjacent = building.stable_adjacent
+    clone.attach = building.attach
+    return clone
+
+def clear_geometry(building):
+    """Sets the neighbor sets of a building as if it had no building pieces
+    or stables."""
+    building.structure = frozenset()
+    building.orthogonal = frozenset()
+    building.adjacent = frozenset()
+    building.stable_orthogonal = frozenset()
+    building.stable_adjacent = frozenset()
+    building.attach = frozenset()
+
+def update_geometry(building, location, is_stable):
+    """Updates the neighbor sets of a building after a building piece or a
+    stable is attached at a location. Only the neighbors of the new location
+    are added so the rest of the building is not looked at again."""
+    pieces = building.locations
+    stables = building.stables
+    structure = building.structure.union([location])
+    building.structure = structure
+    if not is_stable:
+        building.orthogonal = building.orthogonal.union(
+                get_orthogonal(location)).difference(pieces)
+        building.adjacent = building.adjacent.union(
+                get_adjacent(location)).difference(pieces)
+    building.stable_orthogonal = building.stable_orthogonal.union(
+            get_orthogonal(location)).difference(structure)
+    building.stable_adjacent = building.stable_adjacent.union(
+            get_adjacent(location)).difference(structure)
+    building.attach = building.orthogonal.difference(stables)
+
+def rebuild_geometry(building):
+    """Finds the neighbor sets of a building again from all of its building
+    pieces and stables. This is used when a location is removed."""
+    clear_geometry(building)
+    for loc in get_building_locations(building):
+        update_geometry(building, loc, False)
+    for loc in get_stable_locations(building):
+        update_geometry(building, loc, True)
 
 def get_building_color(building):
     """Gets the color of a building"""
-    return building['color']
+    return building.color
 
 def get_building_locations(building):
-    """Gets all the locations a building pieces occupies."""
-    return building['locations'][:]
+    """Gets all the locations a building pieces occupies as a tuple."""
+    return building.locations
 
 def attach_building_locations(building, location):
     """Attaches a building piece to the buliding. The building must no be
     claimed in order to attach building segments."""
     assert not has_owner(building)
-    building['locations'].append(location)
+    building.locations = building.locations + (location,)
+    update_geometry(building, location, False)
+
+def detach_building_location(building, location):
+    """Removes a building piece from a building. This is used to undo
+    attach_building_locations."""
+    building.locations = tuple(loc for loc in building.locations if loc != location)
+    rebuild_geometry(building)
 
 def get_stable_locations(building):
-    """Gets all the stables attached to a building."""
-    return building['stables'][:]
+    """Gets all the stables attached to a building as a tuple."""
+    return building.stables
 
 def buidling_contains_location(building, location):
     """Checks if a location is part of the building."""
     return location in get_building_locations(building)
 
 def get_building_and_stables(building):
-    """Gets all the building and stable locations of a building in a single list."""
-    locs = set(get_stable_locations(building))
-    locs = locs.union(get_building_locations(building))
-    return locs
+    """Gets all the building and stable locations of a building in a single
+    frozen set."""
+    return building.structure
 
 def buliding_contans_location_stables(building, location):
     """Checks if a building or it's attached stables contains a location."""
-    return locaiton in get_building_locations(building) or location in get_stable_locations(building)
+    return location in get_building_and_stables(building)
 
 def get_building_peice_attach(building):
     """Gets all the locations that building peices can be attached, this is the
     list of orthogonal location excluding those occupied by stables."""
-    return get_building_orthogonal(building).difference(set(get_stable_locations(building)));
+    return building.attach
 
 def get_building_orthogonal(building):
-    """Gets a set of all locations orthogonally adjacent to the building. This
-    only includes locations that are next to the building pieces. This will
-    include the location of stables adjacent to the building if any are
+    """Gets a frozen set of all locations orthogonally adjacent to the building.
+    This only includes locations that are next to the building pieces. This
+    will include the location of stables adjacent to the building if any are
     attached."""
-    included = get_building_locations(building)
-    stables = get_stable_locations(building)
-    building_orth = set()
-    for loc in included:
-        if loc not in stables:
-            building_orth.update([orth for orth in get_orthogonal(loc) if orth not in included])
-    return building_orth
+    return building.orthogonal
 
 def get_building_stable_orthogonal(building):
-    """Gets a set of all locations orthogonally adjacent to the building and
-    attached stables. This excludes the locations of stables."""
-    included = get_building_locations(building)[:]
-    included.extend(get_stable_locations(building))
-    building_orth = set()
-    for loc in included:
-        building_orth.update([orth for orth in get_orthogonal(loc) if orth not in included])
-    return building_orth
+    """Gets a frozen set of all locations orthogonally adjacent to the building
+    and attached stables. This excludes the locations of stables."""
+    return building.stable_orthogonal
 
 def get_building_adjacent(building):
-    """Gets a set of all the locations adjacent to the building, excluding
-    those that are part of the building. This is adjacency to building pieces,
-    this does not locations adjacent to attached stables but will include the
-    location of attached stables if they exist."""
-    included = get_building_locations(building)
-    building_adj = set()
-    for loc in included:
-        building_adj.update([adj for adj in get_adjacent(loc) if adj not in included])
-    return building_adj
+    """Gets a frozen set of all the locations adjacent to the building,
+    excluding those that are part of the building. This is adjacency to
+    building pieces, this does not locations adjacent to attached stables but
+    will include the location of attached stables if they exist."""
+    return building.adjacent
 
 def get_building_stable_adjacent(building):
-    """Gets a set of all the locations adjacent to the building and attached
-    stables. This adjacency is to any attached part of the building. It does
-    include locations adjacent to stables and excludes stables."""
-    included = get_building_locations(building)
-    included.extend(get_stable_locations(building))
-    building_adj = set()
-    for loc in included:
-        building_adj.update([adj for adj in get_adjacent(loc) if adj not in included])
-    return building_adj
+    """Gets a frozen set of all the locations adjacent to the building and
+    attached stables. This adjacency is to any attached part of the building.
+    It does include locations adjacent to stables and excludes stables."""
+    return building.stable_adjacent
 
 def attach_stable_location(building, location):
     """Attaches a building piece to a building."""
-    building['stables'].append(location)
+    building.stables = building.stables + (location,)
+    update_geometry(building, location, True)
+
+def detach_stable_location(building, location):
+    """Removes a stable from a building. This is used to undo
+    attach_stable_location."""
+    building.stables = tuple(loc for loc in building.stables if loc != location)
+    rebuild_geometry(building)
 
 def get_owner_color(building):
     """Gets the color of the owner"""
-    return building['owner_color']
+    return building.owner_color
 
 def get_rooftop_location(building):
     """Gets the location of a rooftop in a building"""
-    return building['rooftop']
+    return building.rooftop
 
 def get_owner(building):
     """Gets the owner of a building."""
-    return building['owner']
+    return building.owner
 
 def has_owner(building):
     """Checks if a building has an owner."""
     return get_owner(building) != None
 
-def assign_owner(building, player, color, rooftop=None):
+def assign_owner(building, player, color, rooftop=None, rng=random):
     """Sets the owner of a building. The building must not have an owner to be
-    claimed."""
+    claimed. If the rooftop is not in the building, a random location of the
+    building is chosen with rng (the random module by default)."""
     assert not has_owner(building)
-    building['owner'] = player
-    building['owner_color'] = color
+    building.owner = player
+    building.owner_color = color
     if rooftop == None or rooftop not in get_building_locations(building):
-        rooftop = random.choice(get_building_locations(building))
-    building['rooftop'] = rooftop
+        rooftop = rng.choice(get_building_locations(building))
+    building.rooftop = rooftop
+
+def remove_owner(building):
+    """Removes the owner and rooftop of a building. This is used to undo
+    assign_owner."""
+    building.owner = None
+    building.owner_color = None
+    building.rooftop = None
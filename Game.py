@@ -1,8 +1,9 @@
-"""This module is responsible for running a game"""
+"""This module is responsible for running a game
+
+A game can be run headless with run_game, which does not need a display, or
+with play_game, which draws every move on a board canvas."""
 import random
 import Board
-import BoardCanvas
-import Building
 import Tile
 import Agent
 import Player
@@ -13,14 +14,10 @@ import Score
 
 def game_over(board, players):
     """This method determines if a game is over"""
-    all_names = set([Player.get_player_name(player) for player in players])
-    for color in GameConstants.BUILDINGS_COLORS:
-        claimed = set()
-        for building in Board.get_buildings_by_color(board, color):
-            if Building.has_owner(building) and Building.get_owner(building) != Building.NEUTRAL_OWNER:
-                claimed.add(Building.get_owner(building))
-        if claimed != all_names:
-            return False
+    for player in players:
+        for color in GameConstants.BUILDINGS_COLORS:
+            if not Board.has_claimed_color(board, Player.get_player_name(player), color):
+                return False
     return True
 
 def turn_moves():
@@ -35,12 +32,18 @@ def turn_moves():
         else:
             yield 2
 
-def play_game(board_canvas, board, players, tile_supply, agents,
-    start_player = -1):
-    """This will play a game to completion based on a given setup and then
-    will return a tuple that contains a dictionary of {playername:score for player in players},
-    the final board state, the final player states in a list, and the tile_supply."""
-    current_player = random.randrange(len(players))
+def run_game(board, players, tile_supply, agents, start_player = -1, observer = None,
+    rng = random):
+    """This will play a game to completion based on a given setup without
+    drawing the game and then will return a tuple that contains a dictionary of
+    {playername:score for player in players}, the final board state, the final
+    player states in a list, and the tile_supply.
+
+    If observer is given, it will be called after every move as
+    observer(move, board, players, tile_supply). rng is the random number
+    generator used to pick the start player if start_player is not given, the
+    random module by default."""
+    current_player = rng.randrange(len(players))
     if start_player >= 0:
         current_player = start_player
     moves_per_turn = turn_moves()
@@ -52,28 +55,38 @@ def play_game(board_canvas, board, players, tile_supply, agents,
         for move in selected:
             if Move.get_move_type(move) != Move.NONE_POSSIBLE:
                 all_pass = False
-            board, players, tile_supply = Agent.apply_move(move, board, tile_supply, current_player, players)
-            board_canvas.board = board
-            board_canvas.tile_supply = tile_supply
-            board_canvas.check_well
-            board_canvas.update_board()
+            board, players, tile_supply = Agent.apply_move(move, board, tile_supply, current_player, players, rng)
+            if observer != None:
+                observer(move, board, players, tile_supply)
 
         if  all_pass:
             no_moves += 1
         else:
-            no_moves == 0
+            no_moves = 0
 
         if no_moves == len(players) or game_over(board, players):
-            board_canvas.update_board()
-            get_score = Score.get_score_function(board)
-            return {Player.get_player_name(player):get_score(player) for player in players}, \
+            return {Player.get_player_name(player):Player.get_score(player) for player in players}, \
                     board, players, tile_supply
 
         current_player = (current_player + 1) % len(players)
 
+def play_game(board_canvas, board, players, tile_supply, agents,
+    start_player = -1):
+    """This will play a game to completion based on a given setup, drawing
+    every move on board_canvas, and then will return the same results as
+    run_game."""
+    def update_canvas(move, board, players, tile_supply):
+        board_canvas.board = board
+        board_canvas.tile_supply = tile_supply
+        board_canvas.update_board()
+    results = run_game(board, players, tile_supply, agents, start_player, update_canvas)
+    board_canvas.update_board()
+    return results
+
 if __name__ == "__main__":
+    import BoardCanvas
     board = Board.make_board(11,16)
-    tile_supply = Tile.get_all_tiles()
+    tile_supply = Tile.make_tile_supply()
     board_canvas = BoardCanvas.BoardCanvas(board, tile_supply)
     board_canvas.setup()
 
@@ -214,7 +214,7 @@ if __name__ == "__main__":
     names = ['Nick', 'Zach', 'Brian', 'Aaron']
     players = [Player.make_player(names[i], 4, colors[i]) for i in range(4)]
     board = Board.make_board(11, 16)
-    tile_supply = Tile.get_all_tiles()
+    tile_supply = Tile.make_tile_supply()
 
     grid = BoardCanvas.GRID_SIZE
     gap = BoardCanvas.GRID_GAP
@@ -1,6 +1,24 @@
 """A location is a place within the game board that has a row and column
 
-Locations are used to reference different board elements"""
+Locations are used to reference different board elements
+
+Locations within a board can also be encoded as a single index
+(row * columns + column). Neighbor tables for indices are computed once for
+each board size so finding the neighbors of an index is a table lookup.
+Only neighbors within the bounds of the board are included in the tables.
+
+>>> index = make_index(make_location(1, 2), 16)
+>>> index
+18
+>>> get_index_location(index, 16)
+(1, 2)
+>>> [get_index_location(i, 16) for i in get_orthogonal_indices(index, 11, 16)]
+[(0, 2), (1, 3), (2, 2), (1, 1)]
+>>> [get_index_location(i, 16) for i in get_double_orthogonal_indices(index, 11, 16)]
+[(1, 4), (3, 2), (1, 0)]
+>>> len(get_adjacent_indices(0, 11, 16))
+3
+"""
 
 def make_location(row, column):
     """This method creates a location with a given row and column"""
@@ -61,3 +79,46 @@ def is_within_bounds(location, max_row, max_column, min_row = 0, min_column = 0)
         min_column <= column < max_column"""
     return get_row(location) >= min_row and get_row(location) < max_row and \
             get_column(location) >= min_column and get_column(location) < max_column
+
+def make_index(location, columns):
+    """Encodes a location as a single index for a board with a given number
+    of columns."""
+    return get_row(location) * columns + get_column(location)
+
+def get_index_location(index, columns):
+    """Decodes an index made by make_index back into a location."""
+    return make_location(index // columns, index % columns)
+
+_neighbor_tables = {}
+
+def get_neighbor_tables(rows, columns):
+    """Gets the neighbor tables for a board of a given size. This returns a
+    dictionary with the keys 'orthogonal', 'adjacent' and 'double_orthogonal'
+    where each value is a tuple with a tuple of neighbor indices for each
+    index of the board. The tables are only made once per board size."""
+    key = (rows, columns)
+    if key not in _neighbor_tables:
+        def make_table(get_neighbors):
+            return tuple(tuple(make_index(loc, columns) for loc in \
+                    get_neighbors(get_index_location(index, columns)) \
+                    if is_within_bounds(loc, rows, columns))
+                    for index in range(rows * columns))
+        _neighbor_tables[key] = {'orthogonal': make_table(get_orthogonal),
+                'adjacent': make_table(get_adjacent),
+                'double_orthogonal': make_table(get_double_orthogonal)}
+    return _neighbor_tables[key]
+
+def get_orthogonal_indices(index, rows, columns):
+    """Gets the indices orthogonally adjacent to an index that are within the
+    board."""
+    return get_neighbor_tables(rows, columns)['orthogonal'][index]
+
+def get_adjacent_indices(index, rows, columns):
+    """Gets the indices of the eight adjacent spots to an index that are within
+    the board."""
+    return get_neighbor_tables(rows, columns)['adjacent'][index]
+
+def get_double_orthogonal_indices(index, rows, columns):
+    """Gets the indices of the four orthogonal spots two squares away from an
+    index that are within the board."""
+    return get_neighbor_tables(rows, columns)['double_orthogonal'][index]
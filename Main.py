@@ -44,7 +44,7 @@ def new_game_panel(parent=None):
             return
         players = [Player.make_player(names[i], num_players, colors[i]) for i in range(num_players)]
         board = Board.make_board(11, 16)
-        tile_supply = Tile.get_all_tiles()
+        tile_supply = Tile.make_tile_supply()
 
         grid = BoardCanvas.GRID_SIZE
         gap = BoardCanvas.GRID_GAP
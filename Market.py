@@ -16,24 +16,53 @@ It is possible for a market street to terminate due to a loop or dead ends. If
 this happens, a new market street is started as an extension of this street.
 The rules for placement still apply to the new market street and the new
 market street is also restricted by the old market street(s).
+
+A market keeps the head and tail of the active street and a set of locations
+blocked for merchants (locations on or next to older streets and to merchants
+inside the active street). These are updated as merchants are added so finding
+where a merchant can be added does not depend on the length of the market.
+
+Streets and the blocked locations are never changed once made, a changed
+street is replaced with a new list. This lets clones of a market share them.
 """
 
 from Location import *
 
 def clone_market(market):
-    """Clones a market"""
-    return [street[:] for street in market]
+    """Clones a market. The streets themselves are shared with the clone."""
+    return {'streets': get_streets(market)[:],
+            'ends': get_street_ends(market),
+            'blocked': get_blocked(market)}
 
 def make_market(start):
     """This function will make a market which is the list of all the market
-    streets of merchants there are in the game."""
-    market = [];
-    market.append(make_market_street(start));
+    streets of merchants there are in the game. The market also keeps the open
+    ends (head and tail) of the active street and the set of locations that are
+    blocked for merchants because they are adjacent to an older street or to a
+    merchant inside the active street."""
+    market = {'streets':[], 'ends':(), 'blocked':frozenset()};
+    add_market_street(market, start);
     return market;
 
+def get_streets(market):
+    """Gets the list of all the market streets in a market. The last street is
+    the active street."""
+    return market['streets']
+
+def get_street_ends(market):
+    """Gets the head and tail of the active street as a tuple. This will only
+    have one location if the active street is only one merchant long."""
+    return market['ends']
+
+def get_blocked(market):
+    """Gets the frozen set of locations where merchants can never be added because
+    they are on or adjacent to an older street or to a merchant inside the
+    active street."""
+    return market['blocked']
+
 def market_contains_location(market, loc):
     """Checks if a market contains a specific location in any of its streets."""
-    for street in market:
+    for street in get_streets(market):
         if loc in street:
             return True
     return False
@@ -43,21 +72,53 @@ def add_merchant_to_market(market, merchant):
     cannot be added to the active street"""
     poss = get_possible_addition(market)
     if merchant in poss:
-        add_merchant(get_active_market_street(market), merchant)
+        add_merchant(market, merchant)
     else:
         add_market_street(market, merchant)
 
+def remove_merchant_from_market(market, merchant):
+    """Removes the last merchant added to the market with
+    add_merchant_to_market. If the merchant started a new street, the street
+    is removed as well. The ends and blocked locations are found again from
+    the streets."""
+    streets = get_streets(market)
+    street = get_active_market_street(market)
+    if street == [merchant]:
+        streets.pop()
+    else:
+        streets[-1] = [loc for loc in street if loc != merchant]
+    blocked = set()
+    for older in streets[:-1]:
+        for loc in older:
+            blocked.add(loc)
+            blocked.update(get_orthogonal(loc))
+    ends = tuple(get_head_and_tail(streets[-1]))
+    for loc in streets[-1]:
+        if loc not in ends:
+            blocked.add(loc)
+            blocked.update(get_orthogonal(loc))
+    market['ends'] = ends
+    market['blocked'] = frozenset(blocked)
+
 def get_num_streets(market):
     """Gets the number of streets in a market."""
-    return len(market)
+    return len(get_streets(market))
 
 def add_market_street(market, start):
-    """Adds a new market street to a market and sets it as the active street."""
-    market.append(make_market_street(start))
+    """Adds a new market street to a market and sets it as the active street.
+    The ends of the old active street become blocked as it can no longer
+    grow."""
+    blocked = set()
+    for end in get_street_ends(market):
+        blocked.add(end)
+        blocked.update(get_orthogonal(end))
+    market['blocked'] = get_blocked(market).union(blocked)
+    get_streets(market).append(make_market_street(start))
+    market['ends'] = (start,)
 
 def get_active_market_street(market):
     """Gets the active street in a market."""
-    return  market[-1]
+    return  get_streets(market)[-1]
 
 def make_market_street(start):
     """This function will make a market street which is a saved list of
@@ -68,9 +129,21 @@ def get_street_length(street):
     """Gets the length of a market street."""
     return len(street)
 
-def add_merchant(street, merchant):
-    """Adds a merchant to a market street."""
-    street.append(merchant)
+def add_merchant(market, merchant):
+    """Adds a merchant to the head or tail of the active street in a market.
+    The end the merchant is attached to is now inside the street so the
+    locations next to it become blocked."""
+    ends = get_street_ends(market)
+    if len(ends) == 1:
+        market['ends'] = (ends[0], merchant)
+    else:
+        head, tail = ends
+        if merchant in get_orthogonal(head):
+            head, tail = tail, head
+        market['blocked'] = get_blocked(market).union([tail], get_orthogonal(tail))
+        market['ends'] = (head, merchant)
+    streets = get_streets(market)
+    streets[-1] = streets[-1] + [merchant]
 
 def get_adjacent_to_street(street):
     """Gets all locations orthogonally adjacent to a street."""
@@ -93,25 +166,15 @@ def get_possible_addition(market):
     where they would only have one other merchant adjacent to them; no loops
     allowed. This includes other streets. These locations branch from the head
     and tail of a market street."""
+    ends = get_street_ends(market)
     possible = set()
-    for end in get_head_and_tail(get_active_market_street(market)):
+    for end in ends:
         possible.update(get_orthogonal(end))
-    possible.difference_update(get_active_market_street(market))
-    for street in market:
-        if street != get_active_market_street(market):
-            possible.difference_update(get_adjacent_to_street(street))
-        else:
-            street2 = list(set(street) - set(get_head_and_tail(street)))
-            if(street2):
-                possible.difference_update(set(get_adjacent_to_street(street2)))
-            ends = get_head_and_tail(street)
-            if len(ends) == 2:
-                head = ends[0]
-                tail = ends[1]
-                share = set(get_orthogonal(head)).intersection(set(get_orthogonal(tail)))
-                if share:
-                    #print(head, tail, share)
-                    possible.difference_update(share)
+    possible.difference_update(ends)
+    possible.difference_update(get_blocked(market))
+    if len(ends) == 2:
+        head, tail = ends
+        possible.difference_update(set(get_orthogonal(tail)).intersection(get_orthogonal(head)))
     return possible
 
 def get_head_and_tail(street):
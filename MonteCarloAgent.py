@@ -1,62 +1,325 @@
-"""The intelligent AI is a computer agent that intelligently makes decisions.
-
-There will need to be a high level basis for an agent to process and submit 
-moves. This module is used to make decicons and use the formation (which will be
-created later).
-
-The AI will look at at all moves and select the best moves (this is where the 
-AI and machine learning is important). From these moves, the agent will randomly 
-select moves and only evaulate those few moves. Then the AI will assume moves 
-for the opponent and repeat this process on the results. After a few generations 
-of this process, the agent will evaulate the state of the results and select 
-the move that has the best result. 
-
-tree thingy
-x = number of selected moves per generation
-
-          *start                (1 state, gen 1)
-(select moves from possible)
-     /      |      \
-    *       *       *           (x^2 states, gen 2)
- [assume opponent moves]
-    |       |       |
-(repeat process from start)
-                                (x^3 states, gen 3)
-           ...
-
-(x^n, n is number of generations)
-evaulate the final moves and relate them back to the first generation.
-Whichever first generation had the best moves as results will be selected 
-as the current move. New states will be serached for in a breadth first search 
-so they can all be evaluated compared to each other.
+"""The monte carlo agent is a computer agent that makes decisions with a
+monte carlo tree search (UCT).
+
+The agent grows a tree of moves starting at the current state of the game.
+Each iteration of the search does four things:
+
+ 1. Selection: starting at the root, the child with the best upper confidence
+    bound (UCB1) is followed until a node with untried moves is found.
+ 2. Expansion: one of the untried moves is added to the tree.
+ 3. Rollout: random moves are played from the new node to the end of the game.
+ 4. Backup: the reward of each player at the end of the rollout is added to
+    every node on the path back to the root.
+
+Every node of the tree is a single move. Turns in Medina can have one or two
+moves so a player may make several moves in a row in the tree. Each node saves
+the rewards of every player so games with more than two players are handled by
+having each node choose the child that is best for the player making the move.
+
+The state of the game is changed in place while searching (see
+Agent.apply_move_in_place) and changed back after each iteration so the state
+is never copied during the search.
+
+A search can be limited by a number of iterations, an amount of time or both.
+After each search the agent can report how many iterations were made and how
+many iterations were made per second.
+
+A single python process can only search on one core. The parallel agent
+(get_parallel_monte_carlo_agent) uses root parallelization: each worker
+process grows its own tree from the same root with its own seed, then the
+visits of the moves at the root of every tree are added together and the
+move with the most visits is selected. The seed of each worker is made from
+the seed of the agent so the same seed always gives the same workers seeds.
+The pool of processes belongs to the caller, who closes it when the games are
+over, for example:
+
+    with multiprocessing.Pool(4) as pool:
+        agent = get_parallel_monte_carlo_agent(pool, 4, iterations=1000)
+        ...
 """
 
-import Player
+import math
+import random
+import time
+import multiprocessing
+import Agent
 import Board
+import Building
+import Game
+import Move
+import Player
+import Tile
+
+DEFAULT_EXPLORATION = math.sqrt(2)
+"""Default exploration constant for UCB1"""
+
+MAX_ROLLOUT_MOVES = 1000
+"""Most moves made in a single rollout before the game is scored as is"""
+
+def get_pratical_moves(player, board):
+    """Gets the pratical moves for a player to consider. These are all the
+    possible moves except that only one rooftop move is kept for each color, as
+    the location of a rooftop in a building does not change the game."""
+    moves = []
+    rooftop_colors = set()
+    for move in Agent.get_all_possible_moves(player, board):
+        if Move.get_piece(move) == Move.ROOFTOP:
+            if Move.get_move_color(move) in rooftop_colors:
+                continue
+            rooftop_colors.add(Move.get_move_color(move))
+        moves.append(move)
+    return moves
+
+def is_first_turn(players):
+    """Checks if no player has placed a piece yet."""
+    num_players = len(players)
+    for player in players:
+        if Player.get_num_stables(player) != Player.STABLES_GIVEN[num_players] or \
+                Player.get_held_rooftops(player) != Player.ROOFTOPS_GIVEN[num_players] or \
+                Player.get_held_merchants(player) != Player.MERCHANTS_GIVEN[num_players] or \
+                Player.get_held_walls(player) != Player.WALLS_GIVEN[num_players] or \
+                Player.get_num_tiles(player) > 0:
+            return False
+        for color in Player.get_held_buildings(player):
+            if Player.get_held_buildings_of_color(player, color) != Player.BUILDINGS_GIVEN[num_players]:
+                return False
+    return True
+
+def make_search_state(board, player_index, players, tile_supply, num_moves):
+    """Makes a copy of a game state to search through. The state also tracks
+    whose turn it is, how many moves are left in the turn and the number of
+    turns in a row that no player could move (see Game.play_game)."""
+    upcoming = []
+    if num_moves == 1 and is_first_turn(players):
+        upcoming = [1]
+    return {'board': Board.clone_board(board),
+            'tile_supply': Tile.clone_tile_group(tile_supply),
+            'players': [Player.clone_player(player) for player in players],
+            'current': player_index, 'moves_left': num_moves,
+            'upcoming': upcoming, 'all_pass': True, 'no_moves': 0, 'over': False}
+
+def apply_search_move(state, move):
+    """Applies a move to a search state in place. Returns a record that can
+    be given to unapply_search_move to take back the move."""
+    saved = (state['current'], state['moves_left'], state['upcoming'],
+            state['all_pass'], state['no_moves'], state['over'])
+    undo = Agent.apply_move_in_place(move, state['board'], state['tile_supply'],
+            state['current'], state['players'])
+    if Move.get_move_type(move) != Move.NONE_POSSIBLE:
+        state['all_pass'] = False
+    state['moves_left'] -= 1
+    if state['moves_left'] == 0:
+        players = state['players']
+        if state['all_pass']:
+            state['no_moves'] += 1
+        else:
+            state['no_moves'] = 0
+        state['over'] = state['no_moves'] == len(players) or \
+                Game.game_over(state['board'], players)
+        state['current'] = (state['current'] + 1) % len(players)
+        state['moves_left'] = 2
+        if state['upcoming']:
+            state['moves_left'] = state['upcoming'][0]
+            state['upcoming'] = state['upcoming'][1:]
+        state['all_pass'] = True
+    return undo, saved
+
+def unapply_search_move(state, record):
+    """Takes back a move applied with apply_search_move."""
+    undo, saved = record
+    Agent.unapply_move(undo)
+    state['current'], state['moves_left'], state['upcoming'], \
+            state['all_pass'], state['no_moves'], state['over'] = saved
+
+def get_moves_for_state(state):
+    """Gets the moves the current player of a search state can make."""
+    return get_pratical_moves(state['players'][state['current']], state['board'])
 
-def get_pratical_moves(board, current, num_moves, num_results):
-    """Gets the pratical move combinations for the agent to consider.
-    
-    This should return a list of sets of moves at most num_results long"""
-    pass
-
-def get_monte_carlo_agent(moves_per_branch, num_generations):
-    def make_moves(board, current, num_moves, players):
-        #build a queue for search.
-        
-        #search possiblity tree:
-        #   Get all pratical moves
-        #   Select a few of these pratical moves
-        #   Evaulate the results of each of these moves and put them in the queue
-        #   Read back from the queue num_generations times
-        
-        #evaulate the final board states
-        
-        #select initial move with best results
-        
-        #touch the blessed monkey idol for good luck
-        
-        #return initial move set
-        pass
+def get_rewards(state):
+    """Gets the reward of each player (in the same order as the players) for
+    a search state. Players with the highest score share a reward of 1, every
+    other player gets a reward of 0."""
+    scores = [Player.get_score(player) for player in state['players']]
+    best = max(scores)
+    winners = scores.count(best)
+    return [1 / winners if score == best else 0 for score in scores]
+
+def rollout(state, rng):
+    """Plays random moves from a search state until the end of the game and
+    returns the rewards of each player. The state is put back as it was."""
+    records = []
+    while not state['over'] and len(records) < MAX_ROLLOUT_MOVES:
+        move = rng.choice(get_moves_for_state(state))
+        records.append(apply_search_move(state, move))
+    rewards = get_rewards(state)
+    for record in reversed(records):
+        unapply_search_move(state, record)
+    return rewards
+
+def make_node(move, player_index, num_players):
+    """Makes a node of the search tree for a move made by the player with the
+    given index."""
+    return {'move': move, 'player': player_index, 'children': [], 'untried': None,
+            'visits': 0, 'rewards': [0.0] * num_players}
+
+def select_child(node, exploration):
+    """Selects the child of a node with the best upper confidence bound for
+    the player who makes the child's move."""
+    log_visits = math.log(node['visits'])
+    def get_bound(child):
+        mean = child['rewards'][child['player']] / child['visits']
+        return mean + exploration * math.sqrt(log_visits / child['visits'])
+    return max(node['children'], key=get_bound)
+
+def grow_tree(state, rng, iterations=None, time_limit=None, exploration=DEFAULT_EXPLORATION):
+    """Grows a search tree from a search state. The search stops after a
+    number of iterations or after time_limit seconds, whichever happens first
+    (at least one of the two must be given).
+
+    Returns a tuple of the root of the tree and a dictionary of statistics
+    about the search with the keys 'iterations', 'seconds' and
+    'iterations_per_second'."""
+    assert iterations != None or time_limit != None
+    num_players = len(state['players'])
+    root = make_node(None, None, num_players)
+    start = time.perf_counter()
+    count = 0
+    while (iterations == None or count < iterations) and \
+            (time_limit == None or time.perf_counter() - start < time_limit):
+        node = root
+        path = [root]
+        records = []
+        while not state['over']:
+            if node['untried'] == None:
+                node['untried'] = get_moves_for_state(state)
+                rng.shuffle(node['untried'])
+            if node['untried']:
+                child = make_node(node['untried'].pop(), state['current'], num_players)
+                node['children'].append(child)
+                records.append(apply_search_move(state, child['move']))
+                path.append(child)
+                break
+            node = select_child(node, exploration)
+            records.append(apply_search_move(state, node['move']))
+            path.append(node)
+        rewards = rollout(state, rng)
+        for record in reversed(records):
+            unapply_search_move(state, record)
+        for node in path:
+            node['visits'] += 1
+            for i in range(num_players):
+                node['rewards'][i] += rewards[i]
+        count += 1
+    seconds = time.perf_counter() - start
+    return root, make_stats(count, seconds)
+
+def make_stats(iterations, seconds):
+    """Makes the statistics of a search."""
+    return {'iterations': iterations, 'seconds': seconds,
+            'iterations_per_second': iterations / seconds if seconds > 0 else 0.0}
+
+def get_root_visits(root):
+    """Gets a dictionary of {move: visits} for the children of a root."""
+    return {child['move']: child['visits'] for child in root['children']}
+
+def get_most_visited(state, visits):
+    """Gets the move with the most visits from a dictionary of {move: visits}.
+    If no moves were visited, the first possible move is returned."""
+    if not visits:
+        return get_moves_for_state(state)[0]
+    return max(visits, key=lambda move: visits[move])
+
+def search(state, rng, iterations=None, time_limit=None, exploration=DEFAULT_EXPLORATION):
+    """Searches from a search state for the best move for the current player
+    (see grow_tree for the limits of the search).
+
+    Returns a tuple of the move selected and the statistics of the search."""
+    root, stats = grow_tree(state, rng, iterations, time_limit, exploration)
+    return get_most_visited(state, get_root_visits(root)), stats
+
+def search_worker(args):
+    """Grows a tree in a worker process. args is a tuple of (state, seed,
+    iterations, time_limit, exploration). Returns the visits of the moves at
+    the root and the statistics of the search."""
+    state, seed, iterations, time_limit, exploration = args
+    root, stats = grow_tree(state, random.Random(seed), iterations, time_limit, exploration)
+    return get_root_visits(root), stats
+
+def get_worker_seeds(seed, num_workers):
+    """Gets a seed for each worker made from a single seed."""
+    return [str(seed) + ':' + str(worker) for worker in range(num_workers)]
+
+def parallel_search(pool, num_workers, state, seed, iterations=None,
+        time_limit=None, exploration=DEFAULT_EXPLORATION):
+    """Searches from a search state with root parallelization over a pool of
+    processes. Each of num_workers workers grows a tree with the given
+    limits and the visits at the roots are added together.
+
+    Returns a tuple of the move selected and the statistics of all the
+    searches together, iterations are the total of all the workers and
+    seconds is the time taken for all the workers to finish."""
+    start = time.perf_counter()
+    results = pool.map(search_worker, [(state, worker_seed, iterations, time_limit, exploration)
+            for worker_seed in get_worker_seeds(seed, num_workers)])
+    seconds = time.perf_counter() - start
+    visits = {}
+    count = 0
+    for worker_visits, stats in results:
+        count += stats['iterations']
+        for move in worker_visits:
+            visits[move] = visits.get(move, 0) + worker_visits[move]
+    return get_most_visited(state, visits), make_stats(count, seconds)
+
+def get_monte_carlo_agent(iterations=1000, time_limit=None,
+        exploration=DEFAULT_EXPLORATION, seed=None, on_search=None, rng=None):
+    """Gets an agent that selects moves with a monte carlo tree search. Each
+    move of a turn gets its own search limited by iterations and by
+    time_limit divided by the number of moves in the turn (either limit can be
+    None but not both). If on_search is given, it will be called with the
+    statistics of each search (see search). The search uses rng as its random
+    number generator, or a new one made from seed if rng is not given."""
+    if rng == None:
+        rng = random.Random(seed)
+    def make_moves(board, player_index, players, tile_supply, num_moves):
+        state = make_search_state(board, player_index, players, tile_supply, num_moves)
+        move_time = None
+        if time_limit != None:
+            move_time = time_limit / num_moves
+        moves = []
+        for i in range(num_moves):
+            move, stats = search(state, rng, iterations, move_time, exploration)
+            if on_search != None:
+                on_search(stats)
+            apply_search_move(state, move)
+            moves.append(move)
+        return moves
     return make_moves
 
+def get_parallel_monte_carlo_agent(pool, num_workers=None, iterations=1000, time_limit=None,
+        exploration=DEFAULT_EXPLORATION, seed=None, on_search=None, rng=None):
+    """Gets an agent that selects moves with a root parallel monte carlo tree
+    search with num_workers workers (the number of cores by default) run on
+    pool, a multiprocessing.Pool. The agent does not close the pool, the
+    caller must close it once the agent is no longer used. The limits are the
+    same as get_monte_carlo_agent and apply to each worker. The seeds of the
+    workers are drawn from rng, or a new random number generator made from
+    seed if rng is not given."""
+    if num_workers == None:
+        num_workers = multiprocessing.cpu_count()
+    if rng == None:
+        rng = random.Random(seed)
+    def make_moves(board, player_index, players, tile_supply, num_moves):
+        state = make_search_state(board, player_index, players, tile_supply, num_moves)
+        move_time = None
+        if time_limit != None:
+            move_time = time_limit / num_moves
+        moves = []
+        for i in range(num_moves):
+            move, stats = parallel_search(pool, num_workers, state, rng.getrandbits(64),
+                    iterations, move_time, exploration)
+            if on_search != None:
+                on_search(stats)
+            apply_search_move(state, move)
+            moves.append(move)
+        return moves
+    return make_moves
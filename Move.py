@@ -1,11 +1,17 @@
-"""This module is responsible for making moves in a JSON format then interpreting
-the results of a move by changing a board or making new moves. A move consists
-of different pieces of information:
+"""This module is responsible for making moves then interpreting the results
+of a move by changing a board or making new moves. A move consists of
+different pieces of information:
 
 player_name: name
 move_type: {PASS or NONE_POSSIBLE or NORMAL}
 piece_played: {WALL or BUILDING or STABLE or MERCHANT or ROOFTOP or NO_PLAY}
 location: {row, column}
+color: color of the building for BUILDING and ROOFTOP moves
+
+Moves are kept in memory as a light weight record (a named tuple) so reading
+a field of a move does not require parsing. Moves are only converted to and
+from JSON with encode_move and decode_move when they need to be saved or sent
+somewhere.
 
 >>> move = make_move('Bob',PASS)
 >>> get_player_name(move)
@@ -26,10 +32,14 @@ True
 'WALL'
 >>> get_location(move)
 (1, 2)
+
+>>> decode_move(encode_move(move)) == move
+True
 """
 
 import Location
 import json
+from collections import namedtuple
 
 #Move types
 PASS = 'PASS'
@@ -46,40 +56,54 @@ NEUTRAL_ROOFTOP = 'NEUTRAL'
 WELL = 'WELL'
 NO_PLAY = 'NO PLAY'
 
+MoveRecord = namedtuple('MoveRecord', ['player_name', 'move_type', 'piece_type',
+        'location', 'color'])
+"""In memory representation of a move, fields are in the same order as the
+arguments of make_move"""
 
 def make_move(player_name, move_type, piece_type=None, location=None, color=None):
+    """Makes a move with the given information. The location of a move is
+    saved as a location from the Location module."""
     if move_type != NORMAL:
         assert piece_type == None and location == None
+    else:
+        location = Location.make_location(location[0], location[1])
+
+    return MoveRecord(player_name, move_type, piece_type, location, color)
+
+def encode_move(move):
+    """Encodes a move as a JSON string so it can be saved or sent."""
+    return json.dumps({"player_name": move.player_name, "move_type": move.move_type,
+            "piece_type": move.piece_type, "location": move.location, "color": move.color})
 
-    return json.dumps({"player_name": player_name, "move_type": move_type,
-            "piece_type": piece_type, "location": location,"color": color})
-    #this should return a move with the following information in a JSON format
+def decode_move(encoded):
+    """Decodes a JSON string made by encode_move back into a move."""
+    getter = json.loads(encoded)
+    return make_move(getter['player_name'], getter['move_type'],
+            getter['piece_type'], getter['location'], getter['color'])
 
 def get_player_name(move):
-    getter = json.loads(move)
-    return getter['player_name']
-    #This should parse a move and return the player name
+    """Gets the name of the player who made a move"""
+    return move.player_name
 
 def get_move_color(move):
-    getter = json.loads(move)
-    return getter['color']
+    """Gets the building color of a move"""
+    return move.color
 
 def get_move_type(move):
-    getter = json.loads(move)
-    return getter['move_type']
-    #This should parse the move and reutrn either 'PASS', 'NONE_POSSIBLE', or 'NORMAL'
+    """Gets the type of a move, either 'PASS', 'NONE_POSSIBLE', or 'NORMAL'"""
+    return move.move_type
 
 def get_piece(move):
-    getter = json.loads(move)
-    if get_move_type(move) != NORMAL:
+    """Gets the piece type played in a move (or None if it is not a NORMAL
+    move)"""
+    if move.move_type != NORMAL:
         return None
-    return getter['piece_type']
-    #This should parse the move and return the piece type played (or NO_PLAY)
+    return move.piece_type
 
 def get_location(move):
-    getter = json.loads(move)
-    if get_move_type(move) != NORMAL:
+    """Gets the location of where the move specifies (or None if it is not
+    a NORMAL move)"""
+    if move.move_type != NORMAL:
         return None
-    loc = getter['location']
-    return Location.make_location(loc[0], loc[1])
-    #This should return a location of where the move specifies
+    return move.location
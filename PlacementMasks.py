@@ -0,0 +1,149 @@
+"""Placement masks find where building pieces, stables and merchants can be
+placed on boards encoded with StateEncoding. The rules are the same as
+Board.get_building_piece_locations, Board.get_stable_piece_location and
+Board.get_merchant_place_locations, but every location of every board in a
+batch is checked at once with NumPy.
+
+A mask is a boolean array of the shape of a plane that is True at every
+location where a piece can be placed. The functions of this module take the
+planes of one state, shape (NUM_PLANES, rows, columns), or of a batch of
+states, shape (states, NUM_PLANES, rows, columns), and give masks with the
+same leading shape.
+
+The rules about keeping a gap between structures are dilations: a location is
+next to a structure if the structure is in the 3 by 3 square around it.
+
+get_placement_masks stacks the masks in the same order as the blocks of
+ActionSpace (a building mask for each color, then stables, then merchants), so
+reshaping it to (states, -1) gives the first actions of the action space.
+
+>>> import Board, Player, Tile, StateEncoding
+>>> board = Board.make_board(11, 16)
+>>> players = [Player.make_player(name, 2) for name in ['Nick', 'Erin']]
+>>> planes, features = StateEncoding.encode_state(board, players, Tile.make_tile_supply())
+>>> masks = get_placement_masks(planes)
+>>> masks.shape
+(6, 11, 16)
+>>> set(zip(*masks[-1].nonzero())) == Board.get_merchant_place_locations(board)
+True
+"""
+
+import numpy as np
+import GameConstants
+from StateEncoding import *
+
+def get_orthogonal_mask(mask):
+    """Gets a mask of the locations orthogonally adjacent to any location in a
+    mask. This can include the locations of the mask."""
+    result = np.zeros_like(mask)
+    result[..., 1:, :] |= mask[..., :-1, :]
+    result[..., :-1, :] |= mask[..., 1:, :]
+    result[..., :, 1:] |= mask[..., :, :-1]
+    result[..., :, :-1] |= mask[..., :, 1:]
+    return result
+
+def get_dilated_mask(mask):
+    """Gets a mask of the locations of a mask along with all locations adjacent
+    to them (all eight directions)."""
+    row = mask.copy()
+    row[..., :, 1:] |= mask[..., :, :-1]
+    row[..., :, :-1] |= mask[..., :, 1:]
+    result = row.copy()
+    result[..., 1:, :] |= row[..., :-1, :]
+    result[..., :-1, :] |= row[..., 1:, :]
+    return result
+
+def get_orthogonal_count(mask):
+    """Gets the number of locations of a mask orthogonally adjacent to each
+    location."""
+    count = np.zeros(mask.shape, dtype=np.int8)
+    count[..., 1:, :] += mask[..., :-1, :]
+    count[..., :-1, :] += mask[..., 1:, :]
+    count[..., :, 1:] += mask[..., :, :-1]
+    count[..., :, :-1] += mask[..., :, 1:]
+    return count
+
+def get_plane_mask(planes, plane):
+    """Gets a mask of the locations set in a plane of planes."""
+    return planes[..., plane, :, :] != 0
+
+def get_structure_mask(planes):
+    """Gets a mask of every building piece and stable."""
+    return (planes[..., BUILDING_PLANE:STABLE_PLANE + 1, :, :] != 0).any(axis=-3)
+
+def get_empty_mask(planes):
+    """Gets a mask of the locations without a piece or the well."""
+    return ~(get_structure_mask(planes) | get_plane_mask(planes, MERCHANT_PLANE) | \
+            get_plane_mask(planes, WELL_PLANE))
+
+def get_building_mask(planes, color):
+    """Gets a mask of the locations where a building piece of a color can be
+    placed. Each board has at most one building of a color without an owner,
+    the active building. If there is no active building, a new building can be
+    started at any empty location that is not next to a structure. Otherwise a
+    piece can be attached orthogonally to the active building at an empty
+    location that is not next to any other structure."""
+    color_index = GameConstants.BUILDINGS_COLORS.index(color)
+    active = get_plane_mask(planes, ACTIVE_PLANE)
+    pieces = get_plane_mask(planes, BUILDING_PLANE + color_index) & active
+    orthogonal = get_orthogonal_mask(pieces)
+    stables = get_plane_mask(planes, STABLE_PLANE) & active & orthogonal
+    own_coverage = get_dilated_mask(pieces | stables)
+    coverage = planes[..., COVERAGE_PLANE, :, :]
+    empty = get_empty_mask(planes)
+    has_active = pieces.any(axis=(-2, -1), keepdims=True)
+    attached = orthogonal & empty & (coverage - own_coverage == 0)
+    started = empty & (coverage == 0)
+    return np.where(has_active, attached, started)
+
+def get_building_masks(planes):
+    """Gets the building masks of every color in BUILDINGS_COLORS stacked in
+    an array of shape (..., colors, rows, columns)."""
+    return np.stack([get_building_mask(planes, color) \
+            for color in GameConstants.BUILDINGS_COLORS], axis=-3)
+
+def get_stable_mask(planes):
+    """Gets a mask of the locations where a stable can be placed. A stable
+    must be orthogonal to a building piece at an empty location that is next
+    to only that building."""
+    pieces = (planes[..., BUILDING_PLANE:STABLE_PLANE, :, :] != 0).any(axis=-3)
+    return get_orthogonal_mask(pieces) & get_empty_mask(planes) & \
+            (planes[..., COVERAGE_PLANE, :, :] == 1)
+
+def get_street_ends_mask(street):
+    """Gets a mask of the merchants at the head and tail of each active street,
+    the merchants with at most one other merchant of the street orthogonal to
+    them."""
+    return street & (get_orthogonal_count(street) <= 1)
+
+def get_merchant_mask(planes):
+    """Gets a mask of the locations where a merchant can be placed. Merchants
+    are added to the head or tail of the active street at empty locations that
+    are not next to an older street or the inside of the active street and
+    would not close a loop (see Market.get_possible_addition). If there are no
+    such locations, a new street can be started at any empty location not
+    orthogonal to a merchant."""
+    merchants = get_plane_mask(planes, MERCHANT_PLANE)
+    street = get_plane_mask(planes, STREET_PLANE)
+    older = merchants & ~street
+    ends = get_street_ends_mask(street)
+    interior = street & ~ends
+    empty = get_empty_mask(planes)
+    possible = get_orthogonal_mask(ends) & empty
+    possible &= ~get_orthogonal_mask(older | interior)
+    #A location orthogonal to both the head and tail would close a loop
+    two_ends = get_orthogonal_count(ends) >= 2
+    two_ends &= (ends.sum(axis=(-2, -1), keepdims=True) == 2)
+    possible &= ~two_ends
+    has_addition = possible.any(axis=(-2, -1), keepdims=True)
+    starts = empty & ~get_orthogonal_mask(merchants)
+    return np.where(has_addition, possible, starts)
+
+def get_placement_masks(planes):
+    """Gets the building masks of every color, the stable mask and the merchant
+    mask stacked in an array of shape (..., colors + 2, rows, columns), in the
+    order of the blocks of ActionSpace."""
+    masks = [get_building_mask(planes, color) for color in GameConstants.BUILDINGS_COLORS]
+    masks.append(get_stable_mask(planes))
+    masks.append(get_merchant_mask(planes))
+    return np.stack(masks, axis=-3)
@@ -18,7 +18,12 @@ from Tile import *
         extra_rooftops: Number of extra rooftops given.
         merchants: Number of merchants the player has.
         walls: The number of walls the player has.
-        tiles: Tiles the player has acquired."""
+        tiles: Tiles the player has acquired, saved in a TileGroup.
+        color: Color of the player.
+        score: The score of the player, kept up to date as tiles are given
+            and taken and as moves are applied (see Agent.apply_move).
+
+    These are saved in the slots of a PlayerState."""
 
 BUILDINGS_GIVEN = {2:8,3:6,4:5}
 #Buildings given to each player depending on game size))
@@ -33,6 +38,25 @@ MERCHANTS_GIVEN = {2:12, 3:8, 4:6}
 WALLS_GIVEN = {2:15, 3:12, 4:9}
 #Number of walls given to players
 
+class PlayerState:
+    """The pieces and tiles held by a player. This should only be used
+    through the functions of this module."""
+    __slots__ = ('name', 'buildings', 'stables', 'rooftops', 'extra',
+            'merchants', 'walls', 'tiles', 'color', 'score')
+
+    def __init__(self, name, buildings, stables, rooftops, extra, merchants,
+            walls, tiles, color, score):
+        self.name = name
+        self.buildings = buildings
+        self.stables = stables
+        self.rooftops = rooftops
+        self.extra = extra
+        self.merchants = merchants
+        self.walls = walls
+        self.tiles = tiles
+        self.color = color
+        self.score = score
+
 def make_player(name, num_players, player_color='Blue'):
     """This method will make a player for a given game size
 
@@ -43,38 +67,59 @@ def make_player(name, num_players, player_color='Blue'):
     buildings = {};
     for color in BUILDINGS_COLORS:
         buildings[color] = BUILDINGS_GIVEN[num_players]
-    return {'name':name, 'buildings':buildings, 'stables':STABLES_GIVEN[num_players],
-        'rooftops':ROOFTOPS_GIVEN[num_players], 'extra':EXTRA_ROOFTOPS_GIVEN[num_players],
-        'merchants':MERCHANTS_GIVEN[num_players], 'walls':WALLS_GIVEN[num_players],
-        'tiles':[], 'color':player_color}
+    return PlayerState(name, buildings, STABLES_GIVEN[num_players],
+        ROOFTOPS_GIVEN[num_players], EXTRA_ROOFTOPS_GIVEN[num_players],
+        MERCHANTS_GIVEN[num_players], WALLS_GIVEN[num_players], make_tile_group(),
+        player_color, 0)
 
 def clone_player(player):
-    """Clones a player"""
-    return {'name':get_player_name(player),'buildings':get_held_buildings(player).copy(),
-            'stables':get_num_stables(player), 'rooftops':get_held_rooftops(player),
-            'merchants':get_held_merchants(player),'walls': get_held_walls(player),
-            'color':get_player_color(player), 'extra':get_extra_rooftops(player),
-            'tiles':[clone_tile(tile) for tile in get_tiles(player)]}
+    """Clones a player. The tiles are shared with the clone."""
+    return PlayerState(player.name, player.buildings.copy(), player.stables,
+            player.rooftops, player.extra, player.merchants, player.walls,
+            clone_tile_group(player.tiles), player.color, player.score)
+
+def save_player(player):
+    """Saves the pieces and tiles a player is holding so they can be put back
+    with restore_player. This is a clone of the player."""
+    return clone_player(player)
+
+def restore_player(player, saved):
+    """Restores the pieces and tiles of a player saved with save_player."""
+    for slot in PlayerState.__slots__:
+        setattr(player, slot, getattr(saved, slot))
+    player.buildings = saved.buildings.copy()
+    player.tiles = clone_tile_group(saved.tiles)
+
+def get_score(player):
+    """Gets the score of a player. The score is updated as the player is given
+    and loses tiles and as moves are applied with Agent.apply_move, so it is
+    the same as the score found by Score.get_score_function without looking
+    at the board."""
+    return player.score
+
+def add_score(player, points):
+    """Adds points to the score of a player (points can be negative)."""
+    player.score += points
 
 def get_num_stables(player):
     """Gets the number of stables a player has"""
-    return player['stables']
+    return player.stables
 
 def get_player_color(player):
     """Gets the color of a player"""
-    return player['color']
+    return player.color
 
 def play_stable(player):
     """Plays a stable on the board"""
-    player['stables'] -= 1
+    player.stables -= 1
 
 def get_player_name(player):
     """Gets the name of a player"""
-    return player['name']
+    return player.name
 
 def get_held_buildings(player):
     """Gets the buildings held by a player"""
-    return player['buildings']
+    return player.buildings
 
 def remove_all_buildings_of_color(player, color):
     """Removes all the buildings that a player has of a color"""
@@ -93,82 +138,91 @@ def get_held_buildings_of_color(player, color):
 
 def get_held_rooftops(player):
     """Gets the number of rooftops a player has of their own color"""
-    return player['rooftops']
+    return player.rooftops
 
 def play_rooftop(player):
     """Decrements the number of rooftops the player is holding. If the player
     does not have any rooftops, an exception will be thrown."""
     assert get_held_rooftops(player) > 0
-    player['rooftops'] -= 1
+    player.rooftops -= 1
 
 def get_extra_rooftops(player):
     """Gets the number of rooftops of a nuetral player holds"""
-    return player['extra']
+    return player.extra
 
 def play_extra(player):
     """Decrements the number of neutral rooftops the player is holding. If the
     player does not have any neutral rooftops, an exception will be thrown."""
     assert get_extra_rooftops(player) > 0
-    player['extra'] -= 1
+    player.extra -= 1
 
 def get_held_merchants(player):
     """Gets the number of merchants a player is holding"""
-    return player['merchants']
+    return player.merchants
 
 def play_merchant(player):
     """Decrements the number of merchants a player is holding. If the player
     does not have any merchatns, an exception will be thrown."""
     assert get_held_merchants(player) > 0
-    player['merchants'] -= 1
+    player.merchants -= 1
 
 def give_merchants(player, num_add):
     """Adds merchants to a player's pool of tokens."""
-    player['merchants'] += num_add
+    player.merchants += num_add
 
 def get_held_walls(player):
     """Gets the number of walls a player is holding"""
-    return player['walls']
+    return player.walls
 
 def play_wall(player):
     """Decrements the number of walls a player is holding. if the player does
     not have any walls, an exception will be thrown."""
     assert get_held_walls(player) > 0
-    player['walls'] -= 1
+    player.walls -= 1
+
+def get_tile_group(player):
+    """Gets the group of tiles held by a player (see Tile)."""
+    return player.tiles
 
 def get_tiles(player):
-    """Gets the tiles held by a player."""
-    return player['tiles']
+    """Gets a list of the tiles held by a player."""
+    return get_group_tiles(get_tile_group(player))
 
 def get_num_tiles(player):
     """Gets the number of tiles held by a player."""
-    return len(get_tiles(player))
+    return get_group_size(get_tile_group(player))
+
+def get_num_tiles_of(player, tile_type, value=0):
+    """Gets the number of tiles of a type and value held by a player."""
+    return count_in_group(get_tile_group(player), tile_type, value)
 
 def take_tile(player, tile_type, value):
     """Takes a tile from a player of a given type and value. This will return
     the tile removed. If the player does not have a tile of the given type and
     value, None is returned."""
-    tiles = get_tiles(player)
-    for index in range(len(tiles)):
-        if get_tile_type(tiles[index]) == tile_type and get_tile_value(tiles[index]) == value:
-            return tiles.pop(index)
-    return None
+    tile = take_from_group(get_tile_group(player), tile_type, value)
+    if tile != None:
+        add_score(player, -get_tile_points(tile))
+    return tile
 
 def lose_tile(player, tile_type, value):
     """Takes away one tile of type tile_type and value value from player. If
     the player does not have any tiles of tile_type and value, nothing will
     happen."""
-    for tile in get_tiles(player):
-        if get_tile_type(tile) == tile_type and get_tile_value(tile) == value:
-            get_tiles(player).remove(tile)
-            return
+    take_tile(player, tile_type, value)
 
 def give_tile(player, tile):
     """Gives a player a tile of tile_type and the player will gain the
-    merchants on the tile if the tile is a TOWER_TILE with merchants left."""
-    if get_tile_type(tile) == TOWER_TILE:
-        give_merchants(player, take_merchants(tile))
-    get_tiles(player).append(tile)
+    merchants on the tile if the tile is a TOWER_TILE with merchants left.
+    Tiles may be shared between game states, so the player gets a new tile
+    without merchants instead of the merchants being taken off the tile."""
+    if get_tile_type(tile) == TOWER_TILE and get_num_merchants(tile) > 0:
+        give_merchants(player, get_num_merchants(tile))
+        tile = make_tile(TOWER_TILE, get_tile_value(tile))
+        set_num_merchants(tile, 0)
+    add_to_group(get_tile_group(player), tile)
+    add_score(player, get_tile_points(tile))
 
 def get_tiles_of_type(player, tile_type):
     """Gets all the tiles of a given type that a player owns."""
-    return [tile for tile in get_tiles(player) if get_tile_type(tile) == tile_type]
+    return get_group_tiles_of_type(get_tile_group(player), tile_type)
@@ -6,12 +6,25 @@ from Board import *
 from Player import *
 from Tile import *
 from Building import *
-import tkinter
-from tkinter import messagebox
+
+def get_building_score(board, building):
+    """Gets the points a building is worth to its owner: one for each building
+    piece and stable, four more for each of them two spaces orthogonal to the
+    well, and one for each wall and merchant orthogonal to the building."""
+    bonusLocations = get_double_orthogonal(get_well(board))
+    score = 0
+    for loc in get_building_and_stables(building): #for each square of the building
+        score += 1 #add one because its part of a building (counts stables)
+        if loc in bonusLocations:
+            score += 4
+    score += get_num_walls_adjacent_to_building(board, building) #walls
+    score += get_num_merchants_adjacent_to_building(board, building) #merchants
+    return score
 
 def get_score_function(board):
-    well_location = get_well(board)
-    bonusLocations = set(get_double_orthogonal(well_location))
+    """Gets a function that computes the score of a player on a board from
+    scratch. Players also keep their score up to date as moves are applied
+    (see Player.get_score), which should give the same score."""
     def get_score(player):
         """Score from tiles"""
         """Palace Tiles, Tower Tiles"""
@@ -26,13 +39,7 @@ def get_score_function(board):
         """Stables, Well points, Walls, Merchants"""
         buildingsThePlayerOwns = get_buildings_claimed_by(board, get_player_name(player)) #gets a list of all the buildings the player has
         for building in buildingsThePlayerOwns: #for each building the player has
-            locations = get_building_and_stables(building)
-            for loc in locations: #for each square of the building
-                score += 1 #add one because its part of a building (counts stables)
-                if loc in bonusLocations:
-                    score += 4
-            score += get_num_walls_adjacent_to_building(board, building) #walls
-            score += get_num_merchants_adjacent_to_building(board, building) #merchants
+            score += get_building_score(board, building)
 
         return score
 
@@ -41,6 +48,8 @@ def get_score_function(board):
 def displaySimpleScore(scores):
     """Creates a simple message dialog to diplay the score of players, scores
     is a dictionary of the player names : player scores"""
+    import tkinter
+    from tkinter import messagebox
     scores_list = [(name, scores[name]) for name in scores]
     scores_list.sort(key=lambda a: -a[1])
     result = scores_list[0][0] + " has won the game" + "\n"
@@ -51,6 +60,7 @@ def displaySimpleScore(scores):
 
 
 def displayScores(players, board): #funtion that is called to display scores
+    import tkinter
 
     name = [None] * len(players) #name is a list that will hold player names
     for i in range(len(players)):
@@ -0,0 +1,151 @@
+"""This module runs many games between computer agents at once over a pool of
+processes and collects statistics about the results.
+
+Agents are given as agent factories, functions that take a keyword argument
+rng (a random number generator) and return an agent, such as
+Agent.get_random_agent. Factories are used because the agents themselves are
+closures that cannot be sent to another process. Factories must be defined at
+the top level of a module (or be a functools.partial of such a function) so
+they can be sent to the worker processes.
+
+Every game gets its own random number generators, one for setting up and
+running the game and one for each agent, made from a master seed and the
+number of the game. Games with the same master seed are played the same way
+no matter how many processes are used or in what order the games are run.
+
+The results of each game are a dictionary with the following keys:
+
+game: number of the game
+scores: dictionary of {player name: score}
+winners: list of the names of the players with the highest score
+num_moves: number of moves made in the game
+move_types: dictionary of {piece played or move type: number of moves}
+
+The start player is rotated between games so each agent starts the same
+number of games (or as close as possible).
+"""
+
+import math
+import random
+import multiprocessing
+import Agent
+import Board
+import Game
+import Move
+import Player
+import Tile
+
+DEFAULT_NAMES = ['Nick', 'Erin', 'Brian', 'Zach']
+"""Default names of the players in simulated games"""
+
+DEFAULT_COLORS = ['Blue', 'Green', 'Yellow', 'Red']
+"""Default colors of the players in simulated games"""
+
+Z_95 = 1.959963984540054
+"""Z value for a 95% confidence interval"""
+
+def get_game_rng(seed, game, stream):
+    """Gets the random number generator for a stream of a game made from a
+    master seed. If the seed is None, the generator is not reproducible."""
+    if seed == None:
+        return random.Random()
+    return random.Random(str(seed) + ':' + str(game) + ':' + str(stream))
+
+def play_simulated_game(args):
+    """Plays a single simulated game. args is a tuple of (game number,
+    agent factories, player names, player colors, rows, columns, master
+    seed). Returns the results of the game."""
+    game, factories, names, colors, rows, columns, seed = args
+    num_players = len(factories)
+    rng = get_game_rng(seed, game, 'game')
+    board = Board.make_board(rows, columns, rng)
+    tile_supply = Tile.make_tile_supply()
+    players = [Player.make_player(names[i], num_players, colors[i]) for i in range(num_players)]
+    agents = [factories[i](rng=get_game_rng(seed, game, 'agent' + str(i))) for i in range(num_players)]
+    move_types = {}
+    def count_move(move, board, players, tile_supply):
+        move_type = Move.get_piece(move) or Move.get_move_type(move)
+        move_types[move_type] = move_types.get(move_type, 0) + 1
+    scores, board, players, tile_supply = Game.run_game(board, players, tile_supply,
+            agents, game % num_players, count_move, rng)
+    best = max(scores.values())
+    return {'game': game, 'scores': scores,
+            'winners': [name for name in names[:num_players] if scores[name] == best],
+            'num_moves': sum(move_types.values()), 'move_types': move_types}
+
+def simulate_games(num_games, factories, names=DEFAULT_NAMES, colors=DEFAULT_COLORS,
+        rows=11, columns=16, processes=None, seed=None):
+    """Plays num_games games between the agents made by factories (one factory
+    for each player) over a pool of processes (the number of cores by
+    default). This is a generator that yields the results of each game as
+    soon as the game is finished, so the results may not be in order of the
+    game number. If processes is 1, the games are played in this process.
+    If seed is given, the games are reproducible."""
+    args = [(game, factories, names, colors, rows, columns, seed) for game in range(num_games)]
+    if processes == 1:
+        for arg in args:
+            yield play_simulated_game(arg)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        for results in pool.imap_unordered(play_simulated_game, args):
+            yield results
+
+def get_confidence_interval(successes, trials, z=Z_95):
+    """Gets the Wilson score interval of a rate as a tuple of (low, high)."""
+    if trials == 0:
+        return (0.0, 1.0)
+    rate = successes / trials
+    denominator = 1 + z * z / trials
+    center = (rate + z * z / (2 * trials)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / denominator
+    return (max(0.0, center - spread), min(1.0, center + spread))
+
+def aggregate_results(all_results):
+    """Aggregates the results of many games. Ties for a win are split evenly
+    between the winners. Returns a dictionary with the keys:
+
+    games: number of games
+    mean_moves: mean number of moves in a game
+    move_types: dictionary of {piece played or move type: mean per game}
+    players: dictionary of {player name: statistics} where the statistics
+        are a dictionary with the keys 'wins', 'win_rate', 'interval' (95%
+        confidence interval of the win rate) and 'mean_score'"""
+    games = 0
+    total_moves = 0
+    move_types = {}
+    wins = {}
+    total_scores = {}
+    for results in all_results:
+        games += 1
+        total_moves += results['num_moves']
+        for move_type in results['move_types']:
+            move_types[move_type] = move_types.get(move_type, 0) + results['move_types'][move_type]
+        for name in results['scores']:
+            wins[name] = wins.get(name, 0)
+            total_scores[name] = total_scores.get(name, 0) + results['scores'][name]
+        for name in results['winners']:
+            wins[name] += 1 / len(results['winners'])
+    players = {}
+    for name in wins:
+        players[name] = {'wins': wins[name], 'win_rate': wins[name] / games,
+                'interval': get_confidence_interval(wins[name], games),
+                'mean_score': total_scores[name] / games}
+    return {'games': games, 'mean_moves': total_moves / games if games else 0.0,
+            'move_types': {move_type: move_types[move_type] / games for move_type in move_types},
+            'players': players}
+
+def display_summary(summary):
+    """Prints a summary made by aggregate_results."""
+    print(summary['games'], 'games,', round(summary['mean_moves'], 1), 'moves per game')
+    for name in summary['players']:
+        stats = summary['players'][name]
+        low, high = stats['interval']
+        print('%s: win rate %.3f (%.3f - %.3f), mean score %.1f' % (name,
+                stats['win_rate'], low, high, stats['mean_score']))
+
+if __name__ == "__main__":
+    import sys
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    summary = aggregate_results(simulate_games(num_games, [Agent.get_random_agent] * 4, seed=seed))
+    display_summary(summary)
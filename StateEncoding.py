@@ -0,0 +1,213 @@
+"""The state encoding turns a game state (a board, the players and the tile
+supply) into fixed shape NumPy arrays that can be given to a batched evaluator
+or a neural network.
+
+A state is encoded as planes and features. The planes are an array of shape
+(NUM_PLANES, rows, columns) where each plane has a 1 at every location that has
+a property and a 0 everywhere else (except for the coverage plane):
+
+BUILDING_PLANE + i: building pieces of the color BUILDINGS_COLORS[i]
+STABLE_PLANE: stables
+MERCHANT_PLANE: merchants
+STREET_PLANE: merchants of the active market street
+WELL_PLANE: the well
+WELL_BONUS_PLANE: the locations two spaces orthogonal to the well that are
+    worth bonus points
+WALL_PLANE: locations on the edge of the board next to a wall
+ROOFTOP_PLANE: rooftops
+ACTIVE_PLANE: building pieces and stables of buildings without an owner
+NEUTRAL_PLANE: building pieces and stables of buildings with a neutral owner
+COVERAGE_PLANE: the number of structures (buildings with their stables and the
+    well) that each location is part of or adjacent to, see Board
+OWNER_PLANE + seat: building pieces and stables of buildings owned by the
+    player in a seat
+
+Seats are counted from the player the state is encoded for, seat 0 is that
+player, seat 1 is the next player and so on. This way the same position looks
+the same to every player.
+
+The features are a vector of NUM_FEATURES numbers. For each of the MAX_PLAYERS
+seats there are PLAYER_FEATURES numbers: 1 if there is a player in the seat,
+the buildings held of each color, the stables, rooftops, neutral rooftops,
+merchants and walls held, 1 for each palace tile held (by color), 1 for each
+tower tile held (by tower number) and the number of tea tiles held. After the
+seats come the lengths of the vertical and horizontal walls of each tower and
+the tiles in the supply: 1 for each palace tile (by color), the merchants on
+each tower tile plus one (0 if the tile is not in the supply) and the number of
+tea tiles.
+
+>>> import Board, Player, Tile
+>>> board = Board.make_board(11, 16)
+>>> players = [Player.make_player(name, 2) for name in ['Nick', 'Erin']]
+>>> planes, features = encode_state(board, players, Tile.make_tile_supply())
+>>> planes.shape, features.shape
+((18, 11, 16), (93,))
+>>> int(planes[WELL_PLANE].sum()), int(planes[MERCHANT_PLANE].sum())
+(1, 1)
+>>> states = [(board, players, Tile.make_tile_supply(), i) for i in range(2)]
+>>> planes, features = encode_states(states)
+>>> planes.shape, features.shape
+((2, 18, 11, 16), (2, 93))
+"""
+
+import numpy as np
+import Board
+import Building
+import Location
+import Market
+import Player
+import Tile
+import Tower
+import GameConstants
+
+MAX_PLAYERS = 4
+"""Largest number of players in a game"""
+
+NUM_COLORS = len(GameConstants.BUILDINGS_COLORS)
+
+BUILDING_PLANE = 0
+STABLE_PLANE = BUILDING_PLANE + NUM_COLORS
+MERCHANT_PLANE = STABLE_PLANE + 1
+STREET_PLANE = MERCHANT_PLANE + 1
+WELL_PLANE = STREET_PLANE + 1
+WELL_BONUS_PLANE = WELL_PLANE + 1
+WALL_PLANE = WELL_BONUS_PLANE + 1
+ROOFTOP_PLANE = WALL_PLANE + 1
+ACTIVE_PLANE = ROOFTOP_PLANE + 1
+NEUTRAL_PLANE = ACTIVE_PLANE + 1
+COVERAGE_PLANE = NEUTRAL_PLANE + 1
+OWNER_PLANE = COVERAGE_PLANE + 1
+NUM_PLANES = OWNER_PLANE + MAX_PLAYERS
+
+PLAYER_FEATURES = 1 + NUM_COLORS + 5 + NUM_COLORS + 4 + 1
+"""Features for each seat: present, buildings, stables, rooftops, neutral
+rooftops, merchants, walls, palace tiles, tower tiles and tea tiles"""
+WALL_FEATURES = MAX_PLAYERS * PLAYER_FEATURES
+SUPPLY_FEATURES = WALL_FEATURES + 2 * 4
+NUM_FEATURES = SUPPLY_FEATURES + NUM_COLORS + 4 + 1
+
+DTYPE = np.float32
+"""Type of the numbers in the encoded arrays"""
+
+def make_planes(rows, columns):
+    """Makes an empty array of planes for a board of a given size."""
+    return np.zeros((NUM_PLANES, rows, columns), dtype=DTYPE)
+
+def make_features():
+    """Makes an empty array of features."""
+    return np.zeros(NUM_FEATURES, dtype=DTYPE)
+
+def get_seat(players, player_index, name):
+    """Gets the seat of the player with a name counted from the player at
+    player_index, or None if no player has the name."""
+    for index in range(len(players)):
+        if Player.get_player_name(players[index]) == name:
+            return (index - player_index) % len(players)
+    return None
+
+def set_locations(plane, locations):
+    """Sets every location in a plane to 1. The locations must be within the
+    plane."""
+    if locations:
+        rows, columns = zip(*locations)
+        plane[list(rows), list(columns)] = 1
+
+def fill_planes(planes, board, players, player_index=0):
+    """Writes the planes of a board into an array of planes that is all zeros,
+    made with make_planes. Owners are given seats counted from the player at
+    player_index."""
+    rows = Board.get_rows(board)
+    columns = Board.get_columns(board)
+    for building in Board.get_buildings(board):
+        color = GameConstants.BUILDINGS_COLORS.index(Building.get_building_color(building))
+        set_locations(planes[BUILDING_PLANE + color], Building.get_building_locations(building))
+        set_locations(planes[STABLE_PLANE], Building.get_stable_locations(building))
+        owner = Building.get_owner(building)
+        if owner == None:
+            plane = ACTIVE_PLANE
+        elif owner == Building.NEUTRAL_OWNER:
+            plane = NEUTRAL_PLANE
+        else:
+            plane = OWNER_PLANE + get_seat(players, player_index, owner)
+        set_locations(planes[plane], Building.get_building_and_stables(building))
+        if Building.get_rooftop_location(building) != None:
+            set_locations(planes[ROOFTOP_PLANE], [Building.get_rooftop_location(building)])
+    for street in Market.get_streets(Board.get_market(board)):
+        set_locations(planes[MERCHANT_PLANE], street)
+    set_locations(planes[STREET_PLANE], Market.get_active_market_street(Board.get_market(board)))
+    planes[COVERAGE_PLANE] = Board.get_coverage(board)
+    well = Board.get_well(board)
+    set_locations(planes[WELL_PLANE], [well])
+    set_locations(planes[WELL_BONUS_PLANE], [loc for loc in Location.get_double_orthogonal(well) \
+            if Location.is_within_bounds(loc, rows, columns)])
+    set_locations(planes[WALL_PLANE], [(min(max(row, 0), rows - 1), min(max(column, 0), columns - 1)) \
+            for row, column in Tower.get_wall_locations(Board.get_towers(board))])
+    return planes
+
+def fill_tile_features(features, start, tiles):
+    """Writes the palace tiles, tower tiles and tea tiles in a list of tiles
+    into features starting at the index start. Each tile adds 1 to its
+    feature."""
+    for tile in tiles:
+        tile_type = Tile.get_tile_type(tile)
+        if tile_type == Tile.PALACE_TILE:
+            features[start + Tile.get_tile_value(tile) - 1] = 1
+        elif tile_type == Tile.TOWER_TILE:
+            features[start + NUM_COLORS + Tile.get_tile_value(tile) - 1] += 1
+        else:
+            features[start + NUM_COLORS + 4] += 1
+
+def fill_features(features, board, players, tile_supply, player_index=0):
+    """Writes the features of the players, towers and tile supply into an array
+    of features that is all zeros, made with make_features. Players are put in
+    seats counted from the player at player_index."""
+    assert len(players) <= MAX_PLAYERS
+    for index in range(len(players)):
+        player = players[index]
+        start = (index - player_index) % len(players) * PLAYER_FEATURES
+        features[start] = 1
+        for color in range(NUM_COLORS):
+            features[start + 1 + color] = Player.get_held_buildings_of_color(player,
+                    GameConstants.BUILDINGS_COLORS[color])
+        start += 1 + NUM_COLORS
+        features[start] = Player.get_num_stables(player)
+        features[start + 1] = Player.get_held_rooftops(player)
+        features[start + 2] = Player.get_extra_rooftops(player)
+        features[start + 3] = Player.get_held_merchants(player)
+        features[start + 4] = Player.get_held_walls(player)
+        fill_tile_features(features, start + 5, Player.get_tiles(player))
+    towers = Board.get_towers(board)
+    for number in range(1, 5):
+        tower = Tower.get_tower(towers, number)
+        features[WALL_FEATURES + 2 * (number - 1)] = Tower.get_tower_wall_v(tower)
+        features[WALL_FEATURES + 2 * (number - 1) + 1] = Tower.get_tower_wall_h(tower)
+    fill_tile_features(features, SUPPLY_FEATURES, Tile.get_group_tiles(tile_supply))
+    for tile in Tile.get_group_tiles_of_type(tile_supply, Tile.TOWER_TILE):
+        features[SUPPLY_FEATURES + NUM_COLORS + Tile.get_tile_value(tile) - 1] += \
+                Tile.get_num_merchants(tile)
+    return features
+
+def encode_state(board, players, tile_supply, player_index=0):
+    """Encodes a state for the player at player_index. This returns the
+    planes and the features of the state."""
+    planes = fill_planes(make_planes(Board.get_rows(board), Board.get_columns(board)),
+            board, players, player_index)
+    features = fill_features(make_features(), board, players, tile_supply, player_index)
+    return planes, features
+
+def encode_states(states):
+    """Encodes a list of states into one array of planes of shape
+    (len(states), NUM_PLANES, rows, columns) and one array of features of shape
+    (len(states), NUM_FEATURES). Each state is a tuple of (board, players,
+    tile_supply, player_index) and every board must be the same size."""
+    board = states[0][0]
+    rows = Board.get_rows(board)
+    columns = Board.get_columns(board)
+    planes = np.zeros((len(states), NUM_PLANES, rows, columns), dtype=DTYPE)
+    features = np.zeros((len(states), NUM_FEATURES), dtype=DTYPE)
+    for index in range(len(states)):
+        board, players, tile_supply, player_index = states[index]
+        assert Board.get_rows(board) == rows and Board.get_columns(board) == columns
+        fill_planes(planes[index], board, players, player_index)
+        fill_features(features[index], board, players, tile_supply, player_index)
+    return planes, features
@@ -13,7 +13,7 @@ import Score
 
 if __name__ == "__main__":
     board = Board.make_board(11,16)
-    tile_supply = Tile.get_all_tiles()
+    tile_supply = Tile.make_tile_supply()
     board_canvas = BoardCanvas.BoardCanvas(board, tile_supply)
     board_canvas.setup()
 
@@ -93,7 +93,7 @@ if __name__ == "__main__":
                 
                 #time.sleep(3)
                 board = Board.make_board(11,16)
-                tile_supply = Tile.get_all_tiles()
+                tile_supply = Tile.make_tile_supply()
                 thread = threading.Thread(target = play_game, args=[board, tile_supply, board_canvas])
                 board_canvas.board = board
                 board_canvas.clear_board()
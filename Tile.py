@@ -8,19 +8,36 @@ are awarded for claiming purple buildings.
 If a tile is a tower tile, it will also hold merchants for the first player
 who claims the tile.
 
-Tiles are saved as a dictionary of either two or three elements.
+Tiles are saved as a TileState with three slots.
 
 type: Type of tile, Tea, Tower, or Palace.
 value: Point value of the tile.
 merchants: Only for Tower tiles, the number of merchants left on the
-    tile for players to pickup.
+    tile for players to pickup. This is None for other tiles.
 
+Tiles are shared between clones of a game state so a tile held by a player or
+in the supply should not be changed.
+
+The tiles held by a player and the tiles in the tile supply are kept in a
+TileGroup. A tile group indexes its tiles by type and value, so giving,
+taking and counting tiles of a type and value does not search every tile.
+Each tile is in exactly one group (the supply or a player), so finding who
+holds a tile is one lookup per group. The tiles of each type and value are
+saved in a tuple that is replaced when it changes, so clones of a group share
+their tuples.
 
 >>> tile = make_tile(TEA_TILE)
 >>> get_tile_type(tile)
 'TEA'
 >>> get_tile_value(tile)
 0
+>>> supply = make_tile_supply()
+>>> count_in_group(supply, TEA_TILE), get_group_size(supply)
+(6, 14)
+>>> get_tile_value(take_from_group(supply, TOWER_TILE, 3))
+3
+>>> count_in_group(supply, TOWER_TILE, 3), get_group_size(supply)
+(0, 13)
 """
 
 from GameConstants import *
@@ -32,6 +49,21 @@ PALACE_TILE = 'PAL'
 PALACE_VALUES = {BUILDINGS_COLORS[i]:i+1 for i in range(4)}
 PALACE_COLORS = {i+1:BUILDINGS_COLORS[i] for i in range(4)}
 
+class TileGroup:
+    """The tiles held by a player or in the tile supply. This should only be
+    used through the functions of this module."""
+    __slots__ = ('tiles',)
+
+class TileState:
+    """The type, value and merchants of a tile. This should only be used
+    through the functions of this module."""
+    __slots__ = ('type', 'value', 'merchants')
+
+    def __init__(self, tile_type, value, merchants):
+        self.type = tile_type
+        self.value = value
+        self.merchants = merchants
+
 def get_all_tiles():
     """Gets a new set of tiles for a game"""
     return get_tower_tiles() + get_palace_tiles() + get_tea_tiles()
@@ -50,11 +82,18 @@ def get_tea_tiles():
 
 def get_tile_type(tile):
     """Gets the type of a tile"""
-    return tile['type']
+    return tile.type
 
 def get_tile_value(tile):
     """Gets the value of a tile"""
-    return tile['value']
+    return tile.value
+
+def get_tile_points(tile):
+    """Gets the points a tile is worth at the end of the game. Palace and tower
+    tiles are worth their value, tea tiles are not worth any points."""
+    if get_tile_type(tile) == TEA_TILE:
+        return 0
+    return get_tile_value(tile)
 
 def get_num_merchants(tile):
     """Gets the number of merchants on a tile. If the tile does not have a
@@ -68,8 +107,14 @@ def get_num_merchants(tile):
     >>> get_num_merchants(tile)
     1
     """
-    assert 'merchants' in tile
-    return tile['merchants']
+    assert tile.merchants != None
+    return tile.merchants
+
+def set_num_merchants(tile, num):
+    """Sets the number of merchants on a tile. The tile must have a merchants
+    field."""
+    assert tile.merchants != None
+    tile.merchants = num
 
 def get_palace_tile_color(tile):
     """If a tile is a palace tile, this will get the string corresponding to
@@ -81,19 +126,81 @@ def take_merchants(tile):
     """If the tile has merchants, this method will return the number of
     merchants then set the number of merchants on the tile to zero."""
     num = get_num_merchants(tile)
-    tile['merchants'] = 0
+    tile.merchants = 0
     return num
 
 def clone_tile(tile):
     """Clones a tile"""
-    return tile.copy()
+    return TileState(tile.type, tile.value, tile.merchants)
 
 def make_tile(tile_type, value=0):
     """This function will make and return a tile of a given type and score. If
     the type is  merchant, merchants will be added to the tile."""
-    tile = dict()
-    tile['type'] = tile_type
-    tile['value'] = value
     if tile_type == TOWER_TILE:
-        tile['merchants'] = 4 - value
-    return tile
+        return TileState(tile_type, value, 4 - value)
+    return TileState(tile_type, value, None)
+
+def make_tile_group(tiles=()):
+    """Makes a group of tiles holding the given tiles."""
+    group = TileGroup()
+    group.tiles = {}
+    for tile in tiles:
+        add_to_group(group, tile)
+    return group
+
+def make_tile_supply():
+    """Makes the tile supply for a new game, a group of all the tiles."""
+    return make_tile_group(get_all_tiles())
+
+def clone_tile_group(group):
+    """Clones a group of tiles. The tiles are shared with the clone."""
+    clone = TileGroup()
+    clone.tiles = group.tiles.copy()
+    return clone
+
+def restore_tile_group(group, saved):
+    """Puts back the tiles of a group saved with clone_tile_group."""
+    group.tiles = saved.tiles.copy()
+
+def get_group_tiles(group):
+    """Gets a list of all the tiles in a group."""
+    return [tile for tiles in group.tiles.values() for tile in tiles]
+
+def get_group_tiles_of_type(group, tile_type):
+    """Gets a list of all the tiles of a type in a group."""
+    return [tile for (kind, value), tiles in group.tiles.items() \
+            if kind == tile_type for tile in tiles]
+
+def get_group_tiles_of(group, tile_type, value=0):
+    """Gets a tuple of the tiles of a type and value in a group."""
+    return group.tiles.get((tile_type, value), ())
+
+def get_group_size(group):
+    """Gets the number of tiles in a group."""
+    return sum(len(tiles) for tiles in group.tiles.values())
+
+def get_group_counts(group):
+    """Gets the number of tiles of each type and value in a group as a
+    dictionary of {(type, value): count}."""
+    return {tile_id: len(tiles) for tile_id, tiles in group.tiles.items()}
+
+def count_in_group(group, tile_type, value=0):
+    """Gets the number of tiles of a type and value in a group."""
+    return len(group.tiles.get((tile_type, value), ()))
+
+def add_to_group(group, tile):
+    """Adds a tile to a group."""
+    tile_id = (get_tile_type(tile), get_tile_value(tile))
+    group.tiles[tile_id] = group.tiles.get(tile_id, ()) + (tile,)
+
+def take_from_group(group, tile_type, value=0):
+    """Takes a tile of a type and value out of a group and returns it. If the
+    group does not have a tile of the type and value, None is returned."""
+    tiles = group.tiles.get((tile_type, value))
+    if not tiles:
+        return None
+    if len(tiles) == 1:
+        del group.tiles[(tile_type, value)]
+    else:
+        group.tiles[(tile_type, value)] = tiles[:-1]
+    return tiles[-1]
@@ -20,6 +20,13 @@ def clone_towers(towers):
     return {'rows': get_rows(towers), 'columns': get_columns(towers), \
             'towers':[clone_tower(get_tower(towers, i)) for i in range(1, 5)]}
 
+def share_towers(towers):
+    """Makes a copy of a group of towers that shares each tower with the
+    original. A shared tower must be replaced with set_tower instead of
+    changed."""
+    return {'rows': get_rows(towers), 'columns': get_columns(towers), \
+            'towers': get_structures(towers)[:]}
+
 def get_rows(towers):
     """Gets the rows of the board for towers."""
     return towers['rows']
@@ -61,6 +68,24 @@ def get_wall_locations(towers):
         walls.extend(get_wall_locations_for_tower(towers, num))
     return walls
 
+def is_wall_location(towers, location):
+    """Checks if there is a wall at a location. Only the two towers whose
+    walls can reach the location are looked at, so this does not need to find
+    every wall."""
+    row = get_row(location)
+    column = get_column(location)
+    rows = get_rows(towers)
+    columns = get_columns(towers)
+    if (row == -1 or row == rows) and 0 <= column < columns:
+        left, right = (1, 2) if row == -1 else (3, 4)
+        return column < get_tower_wall_h(get_tower(towers, left)) or \
+                columns - 1 - column < get_tower_wall_h(get_tower(towers, right))
+    if (column == -1 or column == columns) and 0 <= row < rows:
+        top, bottom = (1, 3) if column == -1 else (2, 4)
+        return row < get_tower_wall_v(get_tower(towers, top)) or \
+                rows - 1 - row < get_tower_wall_v(get_tower(towers, bottom))
+    return False
+
 def get_structures(towers):
     """Gets the list of towers from a tower structure made by make_towers"""
     return towers['towers']
@@ -70,6 +95,11 @@ def get_tower(towers, tower_number):
     assert 1 <= tower_number <= 4
     return get_structures(towers)[tower_number - 1]
 
+def set_tower(towers, tower_number, tower):
+    """Replaces a tower of a specific number in towers."""
+    assert 1 <= tower_number <= 4
+    get_structures(towers)[tower_number - 1] = tower
+
 def add_tower_r(tower):
     """Adds one to a tower's row size."""
     tower['builtV'] += 1
@@ -78,6 +108,16 @@ def add_tower_c(tower):
     """Adds one to a tower's column size."""
     tower['builtH'] += 1;
 
+def remove_tower_r(tower):
+    """Removes one from a tower's row size."""
+    assert get_tower_wall_v(tower) > 0
+    tower['builtV'] -= 1
+
+def remove_tower_c(tower):
+    """Removes one from a tower's column size."""
+    assert get_tower_wall_h(tower) > 0
+    tower['builtH'] -= 1
+
 def get_possible_wall_additions(towers):
     """Gets all the possible addtions from each tower."""
     possible = []
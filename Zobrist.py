@@ -0,0 +1,185 @@
+"""Zobrist hashing gives a 64 bit hash of the full state of a game: the
+board, the players and the tile supply. The hash of a state is the XOR of a
+random key for each feature of the state, such as a building piece of a color
+at a location or a player holding a number of walls. When a move changes the
+state, only the keys of the features that changed need to be XORed in or out
+of the hash.
+
+The hash of a state is saved on the board the first time it is asked for with
+get_hash and it is updated by Agent.apply_move_in_place (and so apply_move) as
+moves are made. If a board, player or tile supply is changed without applying
+a move, the saved hash must be cleared with clear_hash.
+
+The keys are made from the features themselves so the same state has the same
+hash in every process.
+
+>>> import Board, Player, Tile
+>>> board = Board.make_board(11, 16)
+>>> players = [Player.make_player(name, 2) for name in ['Nick', 'Erin']]
+>>> tile_supply = Tile.make_tile_supply()
+>>> get_hash(board, players, tile_supply) == get_state_hash(board, players, tile_supply)
+True
+>>> get_key('WELL', (1, 2)) == get_key('WELL', (1, 2))
+True
+
+The hash updated by applying moves in place, and by taking them back, is the
+same as the hash computed from scratch:
+
+>>> import random, Agent, Move
+>>> rng = random.Random(7)
+>>> board, tile_supply = Board.make_board(11, 16, rng), Tile.make_tile_supply()
+>>> players = [Player.make_player(name, 2) for name in ['Nick', 'Erin']]
+>>> undos, pieces, same = [], set(), True
+>>> for i in range(40):
+...     move = rng.choice(Agent.get_all_possible_moves(players[i % 2], board))
+...     pieces.add(Move.get_piece(move) or Move.get_move_type(move))
+...     undos.append(Agent.apply_move_in_place(move, board, tile_supply, i % 2,
+...             players, rng))
+...     same &= Board.get_hash(board) == get_state_hash(board, players, tile_supply)
+>>> sorted(pieces)
+['BUILDING', 'MERCHANT', 'PASS', 'ROOFTOP', 'STABLE', 'WALL']
+>>> for undo in reversed(undos):
+...     Agent.unapply_move(undo)
+...     same &= Board.get_hash(board) == get_state_hash(board, players, tile_supply)
+>>> same
+True
+"""
+
+import hashlib
+import Board
+import Building
+import Market
+import Player
+import Tile
+import Tower
+import GameConstants
+
+_keys = {}
+
+_held_counts = {'STABLE': Player.get_num_stables,
+        'ROOFTOP': Player.get_held_rooftops,
+        'EXTRA': Player.get_extra_rooftops,
+        'MERCHANT': Player.get_held_merchants,
+        'WALL': Player.get_held_walls}
+
+SUPPLY = None
+"""Holder used for tiles in the tile supply"""
+
+def get_key(*feature):
+    """Gets the random 64 bit key for a feature of a game state. A feature is
+    a tuple of values such as ('BUILDING', color, location)."""
+    if feature not in _keys:
+        digest = hashlib.blake2b(repr(feature).encode(), digest_size=8).digest()
+        _keys[feature] = int.from_bytes(digest, 'little')
+    return _keys[feature]
+
+def get_building_key(color, location):
+    """Gets the key of a building piece of a color at a location."""
+    return get_key('BUILDING', color, location)
+
+def get_stable_key(location):
+    """Gets the key of a stable at a location."""
+    return get_key('STABLE', location)
+
+def get_merchant_key(street_number, location):
+    """Gets the key of a merchant at a location in a market street."""
+    return get_key('MERCHANT', street_number, location)
+
+def get_owner_key(building):
+    """Gets the key of the owner and rooftop of a claimed building."""
+    return get_key('ROOFTOP', Building.get_rooftop_location(building),
+            Building.get_owner(building))
+
+def get_tower_key(towers, number):
+    """Gets the key of the length of the walls of a tower."""
+    tower = Tower.get_tower(towers, number)
+    return get_key('WALL_H', number, Tower.get_tower_wall_h(tower)) ^ \
+            get_key('WALL_V', number, Tower.get_tower_wall_v(tower))
+
+def get_board_hash(board):
+    """Gets the hash of the pieces on a board."""
+    value = get_key('WELL', Board.get_well(board))
+    for building in Board.get_buildings(board):
+        color = Building.get_building_color(building)
+        for loc in Building.get_building_locations(building):
+            value ^= get_building_key(color, loc)
+        for loc in Building.get_stable_locations(building):
+            value ^= get_stable_key(loc)
+        if Building.has_owner(building):
+            value ^= get_owner_key(building)
+    streets = Market.get_streets(Board.get_market(board))
+    for number in range(len(streets)):
+        for loc in streets[number]:
+            value ^= get_merchant_key(number, loc)
+    for number in range(1, 5):
+        value ^= get_tower_key(Board.get_towers(board), number)
+    return value
+
+def get_held_key(player, piece):
+    """Gets the key of the number of a piece a player is holding. The piece is
+    'STABLE', 'ROOFTOP', 'EXTRA', 'MERCHANT', 'WALL' or a building color."""
+    if piece in _held_counts:
+        count = _held_counts[piece](player)
+    else:
+        count = Player.get_held_buildings_of_color(player, piece)
+    return get_key('HELD', Player.get_player_name(player), piece, count)
+
+def get_tile_key(holder, group, tile_type, value=0):
+    """Gets the key of the tiles of a type and value in a group held by a
+    holder (a player name or SUPPLY). This is 0 if there are no such tiles."""
+    tiles = Tile.get_group_tiles_of(group, tile_type, value)
+    if not tiles:
+        return 0
+    key = get_key('TILES', holder, (tile_type, value), len(tiles))
+    if tile_type == Tile.TOWER_TILE:
+        for tile in tiles:
+            key ^= get_key('TOWER_MERCHANTS', value, Tile.get_num_merchants(tile))
+    return key
+
+def get_tile_holders_key(tile_supply, players, tile_type, value=0):
+    """Gets the keys of the tiles of a type and value held by the players and
+    the tile supply. When tiles of a type and value move between holders,
+    this is XORed out of the hash before and back in after."""
+    key = get_tile_key(SUPPLY, tile_supply, tile_type, value)
+    for player in players:
+        key ^= get_tile_key(Player.get_player_name(player),
+                Player.get_tile_group(player), tile_type, value)
+    return key
+
+def get_tiles_hash(holder, group):
+    """Gets the hash of a group of tiles held by a holder (a player name or
+    SUPPLY)."""
+    value = 0
+    for tile_type, tile_value in Tile.get_group_counts(group):
+        value ^= get_tile_key(holder, group, tile_type, tile_value)
+    return value
+
+def get_player_hash(player):
+    """Gets the hash of the pieces and tiles a player is holding."""
+    value = 0
+    for piece in list(_held_counts) + GameConstants.BUILDINGS_COLORS:
+        value ^= get_held_key(player, piece)
+    return value ^ get_tiles_hash(Player.get_player_name(player),
+            Player.get_tile_group(player))
+
+def get_holders_hash(tile_supply, players):
+    """Gets the hash of everything held by the players and the tile supply."""
+    value = get_tiles_hash(SUPPLY, tile_supply)
+    for player in players:
+        value ^= get_player_hash(player)
+    return value
+
+def get_state_hash(board, players, tile_supply):
+    """Computes the hash of a full game state from scratch."""
+    return get_board_hash(board) ^ get_holders_hash(tile_supply, players)
+
+def get_hash(board, players, tile_supply):
+    """Gets the hash of a game state. This is computed the first time it is
+    asked for and saved on the board, after that the saved hash is returned."""
+    if Board.get_hash(board) == None:
+        Board.set_hash(board, get_state_hash(board, players, tile_supply))
+    return Board.get_hash(board)
+
+def clear_hash(board):
+    """Clears the hash saved on a board so it will be computed again."""
+    Board.set_hash(board, None)